@@ -1,71 +1,68 @@
-import subprocess
+import argparse
 import os
-import shutil
 import sys
 
-def extract_frames(video_path, output_dir, frame_rate=3):
-    """Extract frames from an MP4 video using FFmpeg."""
-    print(f"Processing video: {video_path}")
-    if not os.path.exists(video_path):
-        print(f"Error: Video file '{video_path}' does not exist.")
-        return False
-    if os.path.exists(output_dir):
-        print(f"Clearing existing output folder: {output_dir}")
-        shutil.rmtree(output_dir)
-    os.makedirs(output_dir)
-    cmd = [
-        "C:\\ffmpeg\\bin\\ffmpeg.exe",
-        "-i", video_path,
-        "-vf", f"fps={frame_rate}",
-        "-q:v", "2",
-        f"{output_dir}/frame_%04d.jpg"
-    ]
-    print(f"FFmpeg command: {' '.join(cmd)}")
-    try:
-        result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        print("FFmpeg output:")
-        print(result.stdout)
-        print(f"Frames extracted to '{output_dir}'.")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"FFmpeg error (exit code {e.returncode}):")
-        print(e.stderr)
-        return False
-    except FileNotFoundError:
-        print("Error: FFmpeg executable not found at C:\\ffmpeg\\bin\\ffmpeg.exe.")
-        return False
+# frame_extractor lives in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def process_threads_videos(base_folders):
-    for base_folder in base_folders:
-        threads_folder = os.path.join(base_folder, 'Threads')
+from frame_config import group_limits, job_settings, load_config
+from frame_extractor import list_videos, manifest_path_for, run_jobs
+
+def collect_threads_jobs(categories):
+    """Build one extraction job per video found in the Threads post folders."""
+    jobs = []
+    for category in categories:
+        threads_folder = category["threads_dir"]
         if not os.path.exists(threads_folder):
-            print(f"No Threads folder in: {base_folder}")
+            print(f"No Threads folder in: {category['dir']}")
             continue
         for post_folder in os.listdir(threads_folder):
             post_path = os.path.join(threads_folder, post_folder)
             if not os.path.isdir(post_path):
                 continue
             # Find all video files in this Post folder
-            video_files = [f for f in os.listdir(post_path) if f.lower().endswith('.mp4')]
-            for video_file in video_files:
+            for video_file in list_videos(post_path) or []:
                 video_path = os.path.join(post_path, video_file)
                 video_name = os.path.splitext(video_file)[0]
                 output_dir = os.path.join(post_path, video_name)
-                print(f"\nExtracting frames from {video_path} to {output_dir}")
-                extract_frames(video_path, output_dir, frame_rate=3)
+                print(f"Queued {video_path} -> {output_dir}")
+                jobs.append({
+                    "video_path": video_path,
+                    "output_dir": output_dir,
+                    "manifest_path": manifest_path_for(post_path),
+                    **job_settings(category),
+                })
+    return jobs
+
+def process_threads_videos(config, report_path=None):
+    jobs = collect_threads_jobs(config["categories"])
+    return run_jobs(jobs, config["max_workers"], config["threads_per_job"], group_limits(config), report_path)
 
 def main():
-    base_folders = [
-        r"C:\Users\felix\OFM\Reels\Images\Student",
-        r"C:\Users\felix\OFM\Reels\Images\Goth",
-        r"C:\Users\felix\OFM\Reels\Images\Nature",
-        r"C:\Users\felix\OFM\Reels\Images\Normal",
-        r"C:\Users\felix\OFM\Reels\Images\Construction",
-        r"C:\Users\felix\OFM\Reels\Images\Gamer"
-    ]
-    process_threads_videos(base_folders)
+    parser = argparse.ArgumentParser(description="Extract frames from every video in the Threads post folders.")
+    parser.add_argument("--config", default=None,
+                        help="Settings file (default: $FRAMES_CONFIG or frames_config.toml)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Remove near-identical frames across each Threads folder after extraction")
+    parser.add_argument("--dedup-action", choices=("link", "delete"), default="link",
+                        help="Replace duplicates with hard links (default) or delete them")
+    parser.add_argument("--dedup-threshold", type=int, default=4,
+                        help="Maximum perceptual-hash distance (0-64) counted as a duplicate")
+    parser.add_argument("--report", default=None,
+                        help="Write a JSON report with per-video timings, frame counts and sizes to this file")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    process_threads_videos(config, args.report)
+    if args.dedup:
+        # Only needed for this optional stage, which pulls in NumPy and Pillow
+        from frame_dedup import dedup_folder
+        for category in config["categories"]:
+            threads_folder = category["threads_dir"]
+            if os.path.isdir(threads_folder):
+                dedup_folder(threads_folder, threshold=args.dedup_threshold, action=args.dedup_action)
     print("\nAll files processed.")
     input("Press Enter to exit...")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
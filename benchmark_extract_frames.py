@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import frame_extractor
+from frame_extractor import iter_frames, parse_output_spec, run_jobs
+
+# Synthetic inputs: (width x height, seconds)
+DEFAULT_VIDEOS = [("640x360", 30), ("1280x720", 60), ("1920x1080", 120)]
+
+CASES = ("serial", "parallel", "keyframe", "seek", "multi_rate_separate", "multi_rate", "streaming")
+
+# Sampling rate used by every case
+BENCH_FRAME_RATE = 1
+
+# Outputs compared by the multi-rate cases
+MULTI_RATE_SPECS = ("1", "3@512")
+
+def make_test_video(path, duration=600, size="1280x720", rate=30, gop=60):
+    """Render a synthetic test video with ffmpeg's testsrc source."""
+    cmd = [
+        frame_extractor.FFMPEG_PATH, "-hide_banner", "-nostdin", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc=duration={duration}:size={size}:rate={rate}",
+        "-pix_fmt", "yuv420p", "-g", str(gop),
+        path
+    ]
+    subprocess.run(cmd, check=True)
+
+def prepare_videos(cache_dir, specs=DEFAULT_VIDEOS):
+    """Generate the synthetic test videos once and reuse them on later runs."""
+    os.makedirs(cache_dir, exist_ok=True)
+    videos = []
+    for size, duration in specs:
+        path = os.path.join(cache_dir, f"testsrc_{size}_{duration}s.mp4")
+        if not os.path.exists(path):
+            print(f"Generating {os.path.basename(path)}...")
+            make_test_video(path, duration=duration, size=size)
+        videos.append({"path": path, "size": size, "duration": duration})
+    return videos
+
+def _count_files(folder):
+    return sum(len(files) for _, _, files in os.walk(folder))
+
+def run_case(case, videos, work_dir):
+    """Run one benchmark case over all videos and return (seconds, frames)."""
+    jobs = [{"video_path": v["path"], "output_dir": os.path.join(work_dir, str(i)), "frame_rate": BENCH_FRAME_RATE}
+            for i, v in enumerate(videos)]
+    start = time.perf_counter()
+
+    if case == "serial":
+        # One video at a time with ffmpeg's own threading, like the original scripts
+        run_jobs(jobs, max_workers=1, threads_per_job=0)
+    elif case == "parallel":
+        run_jobs(jobs)
+    elif case in ("keyframe", "seek"):
+        run_jobs([dict(job, sampling=case) for job in jobs])
+    elif case == "multi_rate_separate":
+        # One full decode per output, which is what multi_rate avoids
+        for spec in MULTI_RATE_SPECS:
+            output = parse_output_spec(spec)
+            run_jobs([dict(job, output_dir=job["output_dir"] + "_" + output["name"], outputs=[output])
+                      for job in jobs])
+    elif case == "multi_rate":
+        outputs = [parse_output_spec(spec) for spec in MULTI_RATE_SPECS]
+        run_jobs([dict(job, outputs=outputs) for job in jobs])
+    elif case == "streaming":
+        frames = 0
+        for video in videos:
+            for _ in iter_frames(video["path"], frame_rate=BENCH_FRAME_RATE):
+                frames += 1
+        return time.perf_counter() - start, frames
+    else:
+        raise ValueError(f"Unknown case '{case}'")
+
+    return time.perf_counter() - start, _count_files(work_dir)
+
+def ffmpeg_version():
+    try:
+        result = subprocess.run([frame_extractor.FFMPEG_PATH, "-version"], stdout=subprocess.PIPE, text=True)
+        return result.stdout.splitlines()[0]
+    except (OSError, IndexError):
+        return None
+
+def compare(results, baseline_path):
+    """Print the change in throughput against an earlier results file."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r["case"]: r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        before = baseline.get(result["case"])
+        if not before or not before.get("realtime_factor") or not result.get("realtime_factor"):
+            continue
+        change = 100 * (result["realtime_factor"] / before["realtime_factor"] - 1)
+        flag = "  <-- slower" if change < -10 else ""
+        print(f"{result['case']:<22}{change:>+8.1f}%{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the frame extraction modes on synthetic test videos.")
+    parser.add_argument("--video", action="append",
+                        help="Benchmark this video instead of the synthetic set (can be repeated)")
+    parser.add_argument("--cache-dir", default=os.path.join(tempfile.gettempdir(), "frames_bench_videos"),
+                        help="Where the generated test videos are kept between runs")
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma-separated cases to run")
+    parser.add_argument("--output", default="benchmark_extract_frames.json", help="JSON results file")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare throughput against")
+    parser.add_argument("--verbose", action="store_true", help="Show the extraction log")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        frame_extractor.log = lambda message: None
+
+    if args.video:
+        videos = []
+        for path in args.video:
+            info = frame_extractor.probe_video(path) or {}
+            videos.append({"path": path, "size": f"{info.get('width')}x{info.get('height')}",
+                           "duration": info.get("duration")})
+    else:
+        videos = prepare_videos(args.cache_dir)
+    source_seconds = sum(v["duration"] or 0 for v in videos)
+
+    results = []
+    print(f"\n{'case':<22}{'seconds':>10}{'frames':>10}{'realtime':>10}")
+    for case in args.cases.split(","):
+        work_dir = tempfile.mkdtemp(prefix="frames_bench_")
+        try:
+            elapsed, frames = run_case(case, videos, work_dir)
+        except ImportError as e:
+            print(f"{case:<22}skipped ({e})")
+            continue
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        factor = source_seconds / elapsed if elapsed else None
+        results.append({
+            "case": case,
+            "seconds": round(elapsed, 3),
+            "frames": frames,
+            "frames_per_second": round(frames / elapsed, 1) if elapsed else None,
+            "realtime_factor": round(factor, 2) if factor else None,
+        })
+        print(f"{case:<22}{elapsed:>10.2f}{frames:>10}{factor or 0:>9.1f}x")
+
+    report = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "ffmpeg": ffmpeg_version(),
+        },
+        "frame_rate": BENCH_FRAME_RATE,
+        "videos": videos,
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+
+import pdf_to_md
+from pdf_to_md import BACKENDS, convert_pages
+
+# Plain-text backends plus the structured Markdown mode, which is compared with
+# pdfplumber's plain text as both read the full page layout
+CASES = tuple(b for b in BACKENDS if b != "auto") + ("structured",)
+
+def run_backend(backend, pdf_paths, out_path):
+    """Convert every PDF with one backend (or "structured") in this process and return its totals."""
+    pages = 0
+    fallbacks = 0
+    errors = 0
+    start = time.perf_counter()
+    for pdf_path in pdf_paths:
+        try:
+            if backend == "structured":
+                written, passed_on = convert_pages(pdf_path, out_path, structured=True)
+            else:
+                written, passed_on = convert_pages(pdf_path, out_path, backend=backend)
+        except Exception as e:
+            print(f"  {backend}: {os.path.basename(pdf_path)} failed: {e}")
+            errors += 1
+            continue
+        pages += written
+        fallbacks += passed_on
+    elapsed = time.perf_counter() - start
+    return {
+        "backend": backend,
+        "seconds": round(elapsed, 3),
+        "pages": pages,
+        "pages_per_second": round(pages / elapsed, 1) if elapsed else None,
+        "pdfplumber_pages": fallbacks,
+        "errors": errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the pdf_to_md backends and modes in pages per second.")
+    parser.add_argument("corpus", nargs="?", default=r"C:\Users\felix\Scripts\PDF",
+                        help="Folder of PDFs to convert")
+    parser.add_argument("--backends", default=",".join(CASES),
+                        help="Comma-separated backends to run; \"structured\" is the structured Markdown mode")
+    parser.add_argument("--output", default="benchmark_pdf_to_md.json", help="JSON results file")
+    args = parser.parse_args()
+
+    pdf_paths = sorted(os.path.join(args.corpus, f) for f in os.listdir(args.corpus) if f.lower().endswith('.pdf'))
+    if not pdf_paths:
+        print(f"No PDF files found in {args.corpus}")
+        return
+
+    results = []
+    out_path = os.path.join(tempfile.gettempdir(), "pdf_to_md_bench.md")
+    print(f"\n{'backend':<14}{'seconds':>10}{'pages':>8}{'pages/s':>10}{'plumber':>9}")
+    try:
+        for backend in args.backends.split(","):
+            try:
+                if backend == "structured":
+                    if importlib.util.find_spec("numpy") is None:
+                        raise ImportError("The structured backend needs NumPy (pip install numpy)")
+                else:
+                    pdf_to_md.resolve_backend(backend)
+            except ImportError as e:
+                print(f"{backend:<14}skipped ({e})")
+                continue
+            result = run_backend(backend, pdf_paths, out_path)
+            results.append(result)
+            print(f"{backend:<14}{result['seconds']:>10.2f}{result['pages']:>8}"
+                  f"{result['pages_per_second'] or 0:>10.1f}{result['pdfplumber_pages']:>9}")
+    finally:
+        if os.path.exists(out_path):
+            os.remove(out_path)
+
+    report = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "corpus": args.corpus,
+        "pdfs": len(pdf_paths),
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    by_case = {r["backend"]: r for r in results}
+    if by_case.get("structured", {}).get("seconds") and by_case.get("pdfplumber", {}).get("seconds"):
+        slowdown = by_case["structured"]["seconds"] / by_case["pdfplumber"]["seconds"]
+        print(f"Structured Markdown costs {slowdown:.2f}x the time of pdfplumber plain text")
+
+if __name__ == "__main__":
+    main()
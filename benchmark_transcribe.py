@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from datetime import datetime
+
+from transcriber import (BACKENDS, DEFAULT_AUDIO_FILE, MODEL_DIR, SAMPLE_RATE, iter_speech_chunks, load_audio,
+                         load_model)
+
+DEFAULT_MODELS = ("tiny", "base", "small")
+
+# faster-whisper precisions tried by default; openai-whisper always runs float32
+DEFAULT_COMPUTE_TYPES = ("int8", "float32")
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB, or None if it can't be measured."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def run_one(model, backend, compute_type, audio_files, model_dir, threads):
+    """Load one configuration, transcribe every file and return its measurements."""
+    audio = [load_audio(path) for path in audio_files]
+    audio_seconds = sum(len(samples) for samples in audio) / SAMPLE_RATE
+
+    start = time.perf_counter()
+    loaded = load_model(model, model_dir, backend, compute_type, threads)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    texts = [loaded.transcribe(samples)["text"].strip() for samples in audio]
+    seconds = time.perf_counter() - start
+    return {
+        "model": model,
+        "backend": backend,
+        "compute_type": compute_type if backend == "faster-whisper" else "float32",
+        "load_seconds": round(load_seconds, 2),
+        "transcribe_seconds": round(seconds, 2),
+        "audio_seconds": round(audio_seconds, 2),
+        "realtime_factor": round(seconds / audio_seconds, 3) if audio_seconds else None,
+        "peak_memory_mb": peak_memory_mb(),
+        "sample_text": texts[0][:80] if texts else "",
+    }
+
+
+def check_vad(speech_seconds=7.0, gap_seconds=1.0, repeats=12, noise=0.003):
+    """Check that streaming mode cuts chunks inside pauses, on a tone with known gaps.
+
+    Writes repeats x (speech_seconds of a 220 Hz tone, gap_seconds of faint
+    noise) to a WAV file, splits it with iter_speech_chunks and returns the
+    chunk starts that fall outside a gap (empty when every cut is in one).
+    """
+    import numpy as np
+    rng = np.random.default_rng(0)
+    period = speech_seconds + gap_seconds
+    seconds = np.arange(int(period * repeats * SAMPLE_RATE)) / SAMPLE_RATE
+    in_gap = seconds % period >= speech_seconds
+    audio = np.where(in_gap, 0.0, 0.3 * np.sin(2 * np.pi * 220 * seconds)) + rng.normal(0, noise, len(seconds))
+
+    path = os.path.join(tempfile.mkdtemp(), "vad_check.wav")
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype('<i2').tobytes())
+    try:
+        starts = [start for start, _ in iter_speech_chunks(path)][1:]
+    finally:
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+    print("Chunks cut at " + ", ".join(f"{start:.2f}s" for start in starts))
+    return [start for start in starts if start % period < speech_seconds]
+
+
+def configurations(models, backends, compute_types):
+    for model in models:
+        for backend in backends:
+            if backend == "faster-whisper":
+                for compute_type in compute_types:
+                    yield model, backend, compute_type
+            else:
+                yield model, backend, "float32"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare Whisper models and backends by real-time factor and memory on this machine.")
+    parser.add_argument("audio_files", nargs="*", default=[DEFAULT_AUDIO_FILE], help="Recordings to transcribe")
+    parser.add_argument("--models", default=",".join(DEFAULT_MODELS), help="Comma-separated model names")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated backends")
+    parser.add_argument("--compute-types", default=",".join(DEFAULT_COMPUTE_TYPES),
+                        help="Comma-separated faster-whisper precisions")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Where the model weights are downloaded")
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads per model (default: engine default)")
+    parser.add_argument("--output", default="benchmark_transcribe.json", help="JSON results file")
+    parser.add_argument("--check-vad", action="store_true",
+                        help="Only check that streaming mode cuts chunks at pauses, on a synthetic recording")
+    parser.add_argument("--single", nargs=3, metavar=("MODEL", "BACKEND", "COMPUTE_TYPE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.check_vad:
+        misplaced = check_vad()
+        if misplaced:
+            print("VAD check failed: cut outside a pause at " + ", ".join(f"{start:.2f}s" for start in misplaced))
+            sys.exit(1)
+        print("VAD check passed: every chunk was cut inside a pause")
+        return
+
+    if args.single:
+        # Child process: one configuration, so its peak memory is measured on its own
+        print(json.dumps(run_one(*args.single, args.audio_files, args.model_dir, args.threads)))
+        return
+
+    models = args.models.split(",")
+    width = max(10, max(len(model) for model in models) + 2)
+    results = []
+    print(f"\n{'model':<{width}}{'backend':<16}{'compute':<14}{'load s':>8}{'RTF':>8}{'peak MB':>10}")
+    for model, backend, compute_type in configurations(models, args.backends.split(","),
+                                                       args.compute_types.split(",")):
+        cmd = [sys.executable, os.path.abspath(__file__), *args.audio_files, "--model-dir", args.model_dir,
+               "--threads", str(args.threads), "--single", model, backend, compute_type]
+        process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            result = json.loads(process.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            error = (process.stderr.strip().splitlines() or ["no output"])[-1]
+            print(f"{model:<{width}}{backend:<16}{compute_type:<14}failed: {error}")
+            continue
+        results.append(result)
+        print(f"{model:<{width}}{backend:<16}{result['compute_type']:<14}{result['load_seconds']:>8.1f}"
+              f"{result['realtime_factor'] or 0:>8.3f}{result['peak_memory_mb'] or 0:>10.0f}")
+
+    report = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "audio_files": args.audio_files,
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if results:
+        fastest = min(results, key=lambda r: r["realtime_factor"] or float("inf"))
+        print(f"Fastest: {fastest['model']} on {fastest['backend']} ({fastest['compute_type']}), "
+              f"RTF {fastest['realtime_factor']} (lower is faster; check sample_text for quality)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,101 +1,66 @@
-import subprocess
+import argparse
 import os
-import shutil
-import sys
 
-def extract_frames(video_path, output_folder, frame_rate=10):
-    """Extract frames from an MP4 video using FFmpeg."""
-    print(f"Processing video: {video_path}")
-    
-    # Check if video file exists
-    if not os.path.exists(video_path):
-        print(f"Error: Video file '{video_path}' does not exist.")
-        return False
+from frame_config import group_limits, job_settings, load_config
+from frame_extractor import list_videos, manifest_path_for, run_jobs
 
-    # Create output folder
-    output_dir = os.path.join(os.path.dirname(video_path), output_folder)
-    print(f"Output directory: {output_dir}")
-    if os.path.exists(output_dir):
-        print("Clearing existing output folder...")
-        shutil.rmtree(output_dir)
-    os.makedirs(output_dir)
+def main():
+    print("Script started.")
 
-    # FFmpeg command with full path to ffmpeg.exe
-    cmd = [
-        "C:\\ffmpeg\\bin\\ffmpeg.exe",  # Hardcoded full path
-        "-i", video_path,
-        "-vf", f"fps={frame_rate}",  # Frame rate (frames per second)
-        "-q:v", "2",  # Quality
-        f"{output_dir}/frame_%04d.jpg"
-    ]
-    print(f"FFmpeg command: {' '.join(cmd)}")
+    parser = argparse.ArgumentParser(description="Extract frames from the videos in each category's Frames folder.")
+    parser.add_argument("--report", default=None,
+                        help="Write a JSON report with per-video timings, frame counts and sizes to this file")
+    args = parser.parse_args()
 
-    try:
-        # Run FFmpeg and capture output
-        result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        print("FFmpeg output:")
-        print(result.stdout)
-        print(f"Frames extracted to '{output_dir}'.")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"FFmpeg error (exit code {e.returncode}):")
-        print(e.stderr)
-        return False
-    except FileNotFoundError:
-        print("Error: FFmpeg executable not found at C:\\ffmpeg\\bin\\ffmpeg.exe.")
-        return False
+    # Categories, folders and per-category settings come from frames_config.toml
+    config = load_config()
+
+    # Collect the videos of every category so they share one worker pool
+    jobs = []
+    for category in config["categories"]:
+        # This script reads the videos stored directly in each category's Frames folder
+        video_dir = category["frames_dir"]
+        print(f"\nScanning directory: {video_dir}")
 
-def main():
-    print("Script started.")
-    
-    # Define the directories containing videos
-    video_folders = [
-        r"C:\Users\felix\OFM\Reels\Images\Student\Frames",
-        r"C:\Users\felix\OFM\Reels\Images\Goth\Frames",
-        r"C:\Users\felix\OFM\Reels\Images\Nature\Frames",
-        r"C:\Users\felix\OFM\Reels\Images\Normal\Frames",
-        r"C:\Users\felix\OFM\Reels\Images\Construction\Frames",
-        r"C:\Users\felix\OFM\Reels\Images\Gamer\Frames"
-    ]
-    
-    # Process each directory
-    for video_dir in video_folders:
-        print(f"\nProcessing directory: {video_dir}")
-        
         # Check if directory exists
         if not os.path.exists(video_dir):
             print(f"Error: Directory '{video_dir}' not found.")
             continue
-        
+
         # Get all MP4 files in the directory
-        try:
-            video_files = [f for f in os.listdir(video_dir) if f.lower().endswith('.mp4')]
-        except FileNotFoundError:
+        video_files = list_videos(video_dir)
+        if video_files is None:
             print(f"Error: Could not access directory '{video_dir}'.")
             continue
-        
+
         if not video_files:
             print(f"No MP4 files found in '{video_dir}'.")
             continue
-        
+
         print(f"Found {len(video_files)} MP4 files to process:")
         for video_file in video_files:
             print(f"- {video_file}")
-        
-        # Process each video
-        for video_file in video_files:
             video_path = os.path.join(video_dir, video_file)
-            print(f"\nProcessing: {video_file}")
-            
-            # Extract frames with adjustable frame rate
-            success = extract_frames(video_path, "Frames", frame_rate=3)  # Adjust frame_rate here
-            if success:
-                print(f"Extraction completed successfully for {video_file}!")
-            else:
-                print(f"Extraction failed for {video_file}. See errors above for details.")
-    
+            # One Frames subfolder per video so concurrent jobs don't clear each other
+            video_name = os.path.splitext(video_file)[0]
+            output_dir = os.path.join(video_dir, "Frames", video_name)
+            jobs.append({
+                "video_path": video_path,
+                "output_dir": output_dir,
+                "manifest_path": manifest_path_for(os.path.join(video_dir, "Frames")),
+                **job_settings(category),
+            })
+
+    for job, success in run_jobs(jobs, config["max_workers"], config["threads_per_job"], group_limits(config),
+                                 args.report):
+        video_file = os.path.basename(job["video_path"])
+        if success:
+            print(f"Extraction completed successfully for {video_file}!")
+        else:
+            print(f"Extraction failed for {video_file}. See errors above for details.")
+
     print("\nAll files processed.")
     input("Press Enter to exit...")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,124 +1,130 @@
-import subprocess
+import argparse
 import os
-import shutil
-import sys
-from datetime import date
-
-def extract_frames(video_path, output_dir, frame_rate=3):
-    """Extract frames from an MP4 video using FFmpeg."""
-    print(f"Processing video: {video_path}")
-    
-    # Check if video file exists
-    if not os.path.exists(video_path):
-        print(f"Error: Video file '{video_path}' does not exist.")
-        return False
 
-    # Create a subfolder for this specific video with today's date and video name
-    video_name = os.path.splitext(os.path.basename(video_path))[0]
-    today_date = date.today().strftime("%Y-%m-%d")
-    video_output_dir = os.path.join(output_dir, f"{today_date}_{video_name}")
-    
-    # Clear existing output folder if it exists
-    if os.path.exists(video_output_dir):
-        print(f"Clearing existing output folder: {video_output_dir}")
-        shutil.rmtree(video_output_dir)
-    
-    os.makedirs(video_output_dir)
-    print(f"Created output directory: {video_output_dir}")
-
-    # FFmpeg command with full path to ffmpeg.exe
-    cmd = [
-        "C:\\ffmpeg\\bin\\ffmpeg.exe",
-        "-i", video_path,
-        "-vf", f"fps={frame_rate}",  # Frame rate (frames per second)
-        "-q:v", "2",  # Quality
-        f"{video_output_dir}\\frame_%04d.jpg"
-    ]
-    print(f"FFmpeg command: {' '.join(cmd)}")
-
-    try:
-        # Run FFmpeg and capture output
-        result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        print("FFmpeg command executed successfully.")
-        print(f"Frames extracted to '{video_output_dir}'.")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"FFmpeg error (exit code {e.returncode}):")
-        print(e.stderr)
-        return False
-    except FileNotFoundError:
-        print("Error: FFmpeg executable not found at C:\\ffmpeg\\bin\\ffmpeg.exe.")
-        return False
+from frame_extractor import (CONTAINERS, DEFAULT_CHUNK_SIZE, DEFAULT_SCENE_THRESHOLD, DEFAULT_THREADS_PER_JOB,
+                             OUTPUT_FORMATS, SAMPLING_MODES, dated_output_dir, list_videos, manifest_path_for,
+                             parse_output_spec, run_jobs)
+
+def process_all_videos_in_directory(video_dir, max_workers=None, threads_per_job=DEFAULT_THREADS_PER_JOB, force=False,
+                                    outputs=None, sampling="fps", frame_rate=3, scene_options=None, report_path=None,
+                                    storage_options=None):
+    """Process all MP4 files in a video directory and extract frames to a Frames subfolder.
 
-def process_all_videos_in_directory(video_dir):
-    """Process all MP4 files in a video directory and extract frames to a Frames subfolder."""
+    Videos already extracted with the same settings are skipped unless force is set.
+    outputs (see parse_output_spec) requests several rates/sizes from one decode.
+    scene_options holds scene_threshold/min_interval/max_interval for scene sampling.
+    report_path, if given, receives a JSON report of per-video timings and output sizes.
+    storage_options holds output_format/container/chunk_size.
+    """
     print(f"\nProcessing video directory: {video_dir}")
-    
+
     # Check if video directory exists
     if not os.path.exists(video_dir):
         print(f"Error: Video directory '{video_dir}' not found.")
         return False
-    
+
     # Create Frames subfolder within the video directory
     frames_dir = os.path.join(video_dir, "Frames")
     if not os.path.exists(frames_dir):
         os.makedirs(frames_dir)
         print(f"Created frames directory: {frames_dir}")
-    
+
     # Get all MP4 files in the video directory
-    try:
-        video_files = [f for f in os.listdir(video_dir) if f.lower().endswith('.mp4')]
-    except FileNotFoundError:
+    video_files = list_videos(video_dir)
+    if video_files is None:
         print(f"Error: Could not access directory '{video_dir}'.")
         return False
-    
+
     if not video_files:
         print(f"No MP4 files found in '{video_dir}'.")
         return True
-    
+
     print(f"Found {len(video_files)} video file(s): {', '.join(video_files)}")
-    
-    # Process all videos in the directory
-    successful_extractions = 0
+
+    # Process all videos in the directory concurrently
+    jobs = []
     for video_file in video_files:
         video_path = os.path.join(video_dir, video_file)
-        print(f"\nProcessing: {video_file}")
-        
-        # Extract frames to the frames directory
-        if extract_frames(video_path, frames_dir, frame_rate=3):
+        jobs.append({
+            "video_path": video_path,
+            "output_dir": dated_output_dir(frames_dir, video_path),
+            "frame_rate": frame_rate,
+            "sampling": sampling,
+            "manifest_path": manifest_path_for(frames_dir),
+            "force": force,
+            "outputs": outputs,
+            **(scene_options or {}),
+            **(storage_options or {}),
+        })
+
+    successful_extractions = 0
+    for job, success in run_jobs(jobs, max_workers=max_workers, threads_per_job=threads_per_job,
+                                 report_path=report_path):
+        video_file = os.path.basename(job["video_path"])
+        if success:
             print(f"Extraction completed successfully for {video_file}!")
             successful_extractions += 1
         else:
             print(f"Extraction failed for {video_file}. See errors above for details.")
-    
+
     print(f"\nProcessed {successful_extractions} out of {len(video_files)} videos successfully.")
     return successful_extractions > 0
 
 def main():
     print("Frame Extraction Script (Command Line Version)")
-    print("Usage: python extract_frames_cmdline.py <video_folder_path>")
-    
-    # Check if video folder path is provided as command line argument
-    if len(sys.argv) != 2:
-        print("\nError: Please provide the video folder path as an argument.")
-        print("Example: python extract_frames_cmdline.py \"C:\\path\\to\\video\\folder\"")
-        input("Press Enter to exit...")
-        return
-    
-    video_folder = sys.argv[1]
-    
+
+    parser = argparse.ArgumentParser(description="Extract frames from every MP4 in a folder.")
+    parser.add_argument("video_folder", help="Folder containing the videos")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of videos processed at once (default: based on CPU cores)")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS_PER_JOB,
+                        help="FFmpeg threads per video")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-extract videos even if they are unchanged since the last run")
+    parser.add_argument("--rates", default=None,
+                        help="Several outputs from one decode, e.g. \"1,3@512\" for 1 fps full size "
+                             "and 3 fps scaled to 512 px wide")
+    parser.add_argument("--rate", type=float, default=3, help="Frames per second to extract")
+    parser.add_argument("--sampling", choices=SAMPLING_MODES, default="fps",
+                        help="fps decodes every frame; keyframe and seek are faster for coarse sampling of long videos")
+    parser.add_argument("--scene-threshold", type=float, default=DEFAULT_SCENE_THRESHOLD,
+                        help="Scene-change score (0-1) needed to keep a frame with --sampling scene")
+    parser.add_argument("--min-interval", type=float, default=None,
+                        help="Minimum seconds between scene frames")
+    parser.add_argument("--max-interval", type=float, default=None,
+                        help="Keep a frame at least this often even without a scene change")
+    parser.add_argument("--report", default=None,
+                        help="Write a JSON report with per-video timings, frame counts and sizes to this file")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="jpg",
+                        help="Frame format: jpg, webp, lossless png, or npy stacks of raw RGB frames")
+    parser.add_argument("--container", choices=CONTAINERS, default=None,
+                        help="Pack image frames into uncompressed tar or zip archives")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Frames per archive or npy stack")
+    args = parser.parse_args()
+    outputs = [parse_output_spec(spec) for spec in args.rates.split(",")] if args.rates else None
+    storage_options = {"output_format": args.format, "container": args.container, "chunk_size": args.chunk_size}
+    scene_options = None
+    if args.sampling == "scene":
+        scene_options = {
+            "scene_threshold": args.scene_threshold,
+            "min_interval": args.min_interval,
+            "max_interval": args.max_interval,
+        }
+
     # Remove quotes if present (in case user wraps path in quotes)
-    video_folder = video_folder.strip('"').strip("'")
-    
+    video_folder = args.video_folder.strip('"').strip("'")
+
     print(f"\nVideo folder: {video_folder}")
-    
+
     # Process the directory
-    if process_all_videos_in_directory(video_folder):
+    if process_all_videos_in_directory(video_folder, args.workers, args.threads, args.force, outputs,
+                                       args.sampling, args.rate, scene_options, args.report, storage_options):
         print("\nFrame extraction completed successfully!")
     else:
         print("\nFrame extraction failed or no videos were processed.")
-    
+
     input("Press Enter to exit...")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,124 +1,108 @@
-import subprocess
+import argparse
 import os
-import shutil
-import sys
-from datetime import date  # Import the date module
-
-def extract_frames(video_path, output_dir, frame_rate=3):
-    """Extract frames from an MP4 video using FFmpeg."""
-    print(f"Processing video: {video_path}")
-    
-    # Check if video file exists
-    if not os.path.exists(video_path):
-        print(f"Error: Video file '{video_path}' does not exist.")
-        return False
-
-    # Create a subfolder for this specific video with today's date and video name
-    video_name = os.path.splitext(os.path.basename(video_path))[0]
-    today_date = date.today().strftime("%Y-%m-%d")
-    video_output_dir = os.path.join(output_dir, f"{today_date}_{video_name}")
-    
-    # Clear existing output folder if it exists
-    if os.path.exists(video_output_dir):
-        print(f"Clearing existing output folder: {video_output_dir}")
-        shutil.rmtree(video_output_dir)
-    
-    os.makedirs(video_output_dir)
-    print(f"Created output directory: {video_output_dir}")
-
-    # FFmpeg command with full path to ffmpeg.exe
-    cmd = [
-        "C:\\ffmpeg\\bin\\ffmpeg.exe",
-        "-i", video_path,
-        "-vf", f"fps={frame_rate}",  # Frame rate (frames per second)
-        "-q:v", "2",  # Quality
-        f"{video_output_dir}\\frame_%04d.jpg"
-    ]
-    print(f"FFmpeg command: {' '.join(cmd)}")
-
-    try:
-        # Run FFmpeg and capture output
-        result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        print("FFmpeg command executed successfully.")
-        print(f"Frames extracted to '{video_output_dir}'.")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"FFmpeg error (exit code {e.returncode}):")
-        print(e.stderr)
-        return False
-    except FileNotFoundError:
-        print("Error: FFmpeg executable not found at C:\\ffmpeg\\bin\\ffmpeg.exe.")
-        return False
-
-def process_directory(video_dir, frames_dir):
-    """Process all MP4 files in a video directory and extract frames to the frames directory."""
-    print(f"\nProcessing video directory: {video_dir}")
-    
+
+from frame_config import group_limits, job_settings, load_config
+from frame_extractor import dated_output_dir, list_videos, manifest_path_for, run_jobs, watch_and_extract
+
+def find_latest_video(video_dir):
+    """Return the path of the most recent MP4 in a video directory, or None."""
+    print(f"\nScanning video directory: {video_dir}")
+
     # Check if video directory exists
     if not os.path.exists(video_dir):
         print(f"Error: Video directory '{video_dir}' not found.")
-        return False
-    
+        return None
+
     # Get all MP4 files in the video directory
-    try:
-        video_files = [f for f in os.listdir(video_dir) if f.lower().endswith('.mp4')]
-    except FileNotFoundError:
+    video_files = list_videos(video_dir)
+    if video_files is None:
         print(f"Error: Could not access directory '{video_dir}'.")
-        return False
-    
+        return None
+
     if not video_files:
         print(f"No MP4 files found in '{video_dir}'.")
-        return True
-    
-    # Find the most recent video based on creation time
+        return None
+
+    # Find the most recent video based on modification time
     most_recent_video = max(video_files, key=lambda f: os.path.getmtime(os.path.join(video_dir, f)))
     print(f"Most recent video: {most_recent_video}")
-    
-    # Process the most recent video
-    video_path = os.path.join(video_dir, most_recent_video)
-    print(f"\nProcessing: {most_recent_video}")
-    
-    # Extract frames to the frames directory
-    if extract_frames(video_path, frames_dir, frame_rate=3):
-        print(f"Extraction completed successfully for {most_recent_video}!")
-        return True
-    else:
-        print(f"Extraction failed for {most_recent_video}. See errors above for details.")
-        return False
+    return os.path.join(video_dir, most_recent_video)
+
+def make_job(video_path, category):
+    """Extraction job writing a video's frames into a dated folder of its category's Frames folder."""
+    frames_dir = category["frames_dir"]
+    return {
+        "video_path": video_path,
+        "output_dir": dated_output_dir(frames_dir, video_path),
+        "manifest_path": manifest_path_for(frames_dir),
+        **job_settings(category),
+    }
+
+def watch(config):
+    """Keep running and extract frames from each new video as soon as it has finished writing."""
+    category_for = {os.path.normpath(category["video_dir"]): category for category in config["categories"]}
+
+    def job_for(video_path):
+        category = category_for.get(os.path.dirname(video_path))
+        return make_job(video_path, category) if category else None
+
+    watch_and_extract(list(category_for), job_for, config["max_workers"], config["threads_per_job"],
+                      group_limits=group_limits(config))
 
 def main():
     print("Frame Extraction Script Started")
-    
-    # Define video and frames directories to process
-    video_directories = [
-        r"C:\Users\felix\OFM\Reels\Images\Student\Video",
-        r"C:\Users\felix\OFM\Reels\Images\Goth\Video",
-        r"C:\Users\felix\OFM\Reels\Images\Nature\Video",
-        r"C:\Users\felix\OFM\Reels\Images\Normal\Video",
-        r"C:\Users\felix\OFM\Reels\Images\Construction\Video",
-        r"C:\Users\felix\OFM\Reels\Images\Gamer\Video"
-    ]
-    
-    frames_directories = [
-        r"C:\Users\felix\OFM\Reels\Images\Student\Frames",
-        r"C:\Users\felix\OFM\Reels\Images\Goth\Frames",
-        r"C:\Users\felix\OFM\Reels\Images\Nature\Frames",
-        r"C:\Users\felix\OFM\Reels\Images\Normal\Frames",
-        r"C:\Users\felix\OFM\Reels\Images\Construction\Frames",
-        r"C:\Users\felix\OFM\Reels\Images\Gamer\Frames"
-    ]
-    
-    # Process each directory
-    total_dirs = len(video_directories)
+
+    parser = argparse.ArgumentParser(description="Extract frames from the latest video of each category.")
+    parser.add_argument("--config", default=None,
+                        help="Settings file (default: $FRAMES_CONFIG or frames_config.toml)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Remove near-identical frames from the Frames folders after extraction")
+    parser.add_argument("--dedup-action", choices=("link", "delete"), default="link",
+                        help="Replace duplicates with hard links (default) or delete them")
+    parser.add_argument("--dedup-threshold", type=int, default=4,
+                        help="Maximum perceptual-hash distance (0-64) counted as a duplicate")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and extract frames from new videos as they arrive")
+    parser.add_argument("--report", default=None,
+                        help="Write a JSON report with per-video timings, frame counts and sizes to this file")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+
+    if args.watch:
+        watch(config)
+        return
+
+    # Queue the most recent video of each category
+    total_dirs = len(config["categories"])
+    jobs = []
+    for category in config["categories"]:
+        video_path = find_latest_video(category["video_dir"])
+        if video_path:
+            jobs.append(make_job(video_path, category))
+
+    # Extract all of them concurrently
     processed_dirs = 0
-    
-    for video_dir, frames_dir in zip(video_directories, frames_directories):
-        if process_directory(video_dir, frames_dir):
+    for job, success in run_jobs(jobs, config["max_workers"], config["threads_per_job"], group_limits(config),
+                                 args.report):
+        video_file = os.path.basename(job["video_path"])
+        if success:
+            print(f"Extraction completed successfully for {video_file}!")
             processed_dirs += 1
-    
+        else:
+            print(f"Extraction failed for {video_file}. See errors above for details.")
+
+    if args.dedup:
+        # Only needed for this optional stage, which pulls in NumPy and Pillow
+        from frame_dedup import dedup_folder
+        for category in config["categories"]:
+            frames_dir = category["frames_dir"]
+            if os.path.isdir(frames_dir):
+                dedup_folder(frames_dir, threshold=args.dedup_threshold, action=args.dedup_action)
+
     print(f"\nProcessed {processed_dirs} out of {total_dirs} directories")
     print("Frame extraction complete!")
     input("Press Enter to exit...")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,54 +1,6 @@
-import subprocess
 import os
-import shutil
-import sys
-from datetime import date
 
-def extract_frames(video_path, output_dir, frame_rate=3):
-    """Extract frames from an MP4 video using FFmpeg."""
-    print(f"Processing video: {video_path}")
-    
-    # Check if video file exists
-    if not os.path.exists(video_path):
-        print(f"Error: Video file '{video_path}' does not exist.")
-        return False
-
-    # Create a subfolder for this specific video with today's date and video name
-    video_name = os.path.splitext(os.path.basename(video_path))[0]
-    today_date = date.today().strftime("%Y-%m-%d")
-    video_output_dir = os.path.join(output_dir, f"{today_date}_{video_name}")
-    
-    # Clear existing output folder if it exists
-    if os.path.exists(video_output_dir):
-        print(f"Clearing existing output folder: {video_output_dir}")
-        shutil.rmtree(video_output_dir)
-    
-    os.makedirs(video_output_dir)
-    print(f"Created output directory: {video_output_dir}")
-
-    # FFmpeg command with full path to ffmpeg.exe
-    cmd = [
-        "C:\\ffmpeg\\bin\\ffmpeg.exe",
-        "-i", video_path,
-        "-vf", f"fps={frame_rate}",  # Frame rate (frames per second)
-        "-q:v", "2",  # Quality
-        f"{video_output_dir}\\frame_%04d.jpg"
-    ]
-    print(f"FFmpeg command: {' '.join(cmd)}")
-
-    try:
-        # Run FFmpeg and capture output
-        result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        print("FFmpeg command executed successfully.")
-        print(f"Frames extracted to '{video_output_dir}'.")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"FFmpeg error (exit code {e.returncode}):")
-        print(e.stderr)
-        return False
-    except FileNotFoundError:
-        print("Error: FFmpeg executable not found at C:\\ffmpeg\\bin\\ffmpeg.exe.")
-        return False
+from frame_extractor import dated_output_dir, extract_frames, manifest_path_for
 
 def process_single_video(video_path):
     """Process a single video file and extract frames to a Frames subfolder in the same directory."""
@@ -68,8 +20,10 @@ def process_single_video(video_path):
         os.makedirs(frames_dir)
         print(f"Created frames directory: {frames_dir}")
     
-    # Extract frames from the video
-    if extract_frames(video_path, frames_dir, frame_rate=3):
+    # Extract frames from the video, giving the single job every core
+    output_dir = dated_output_dir(frames_dir, video_path)
+    if extract_frames(video_path, output_dir, frame_rate=3, threads=os.cpu_count(),
+                      manifest_path=manifest_path_for(frames_dir)):
         print(f"Extraction completed successfully for {os.path.basename(video_path)}!")
         return True
     else:
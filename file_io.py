@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import threading
+from contextlib import contextmanager
+
+
+def load_json(path):
+    """Read a JSON object from path, returning an empty dict if it is missing or corrupt."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return data
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_json(path, data, indent=None):
+    """Write data to path atomically so an interrupted run never leaves it half written."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Unique temp name: two workers may save the same file at once
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+@contextmanager
+def ffmpeg_output(cmd, source, bufsize=-1):
+    """Run an ffmpeg command and give its stdout pipe to read raw output from.
+
+    ffmpeg is killed if the block exits before reading everything, and a
+    nonzero exit after a complete read raises RuntimeError with the end of
+    its stderr, naming source.
+    """
+    stderr_lines = []
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               bufsize=bufsize)
+    # Drain stderr in the background so a chatty ffmpeg can't block on a full pipe
+    drain = threading.Thread(
+        target=lambda: stderr_lines.extend(process.stderr.read().decode(errors="replace").splitlines()),
+        daemon=True)
+    drain.start()
+    try:
+        yield process.stdout
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        returncode = process.wait()
+        drain.join()
+
+    if returncode != 0:
+        raise RuntimeError(f"FFmpeg error for {source} (exit code {returncode}):\n" + "\n".join(stderr_lines[-20:]))
@@ -0,0 +1,134 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+# inotify event flags (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _open_inotify(folders):
+    """Start watching folders with inotify; returns (fd, {wd: folder}) or None if unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+
+    watches = {}
+    mask = IN_CREATE | IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO
+    for folder in folders:
+        wd = libc.inotify_add_watch(fd, os.fsencode(folder), mask)
+        if wd < 0:
+            print(f"Warning: Could not watch '{folder}' (errno {ctypes.get_errno()}).")
+            continue
+        watches[wd] = folder
+    if not watches:
+        os.close(fd)
+        return None
+    return fd, watches
+
+
+def _read_inotify(fd, watches, timeout):
+    """Paths touched since the last call, waiting up to timeout seconds for the first event.
+
+    Returns None if the kernel queue overflowed and events were lost.
+    """
+    ready, _, _ = select.select([fd], [], [], timeout)
+    if not ready:
+        return []
+    data = os.read(fd, 64 * 1024)
+    paths = []
+    offset = 0
+    while offset < len(data):
+        wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+        offset += _EVENT_HEADER.size
+        name = data[offset:offset + length].rstrip(b"\0")
+        offset += length
+        if mask & IN_Q_OVERFLOW:
+            return None
+        if wd in watches and name:
+            paths.append(os.path.join(watches[wd], os.fsdecode(name)))
+    return paths
+
+
+def _scan(folders, extensions):
+    """All matching file paths currently in folders (polling fallback)."""
+    paths = set()
+    for folder in folders:
+        try:
+            with os.scandir(folder) as entries:
+                paths.update(entry.path for entry in entries
+                             if entry.name.lower().endswith(extensions) and entry.is_file())
+        except OSError:
+            continue
+    return paths
+
+
+def iter_new_files(folders, extensions, settle_time=5.0, poll_interval=1.0):
+    """Yield files that appear in folders once their size has stopped changing.
+
+    Uses inotify on Linux and falls back to polling the folder listings
+    elsewhere. Files already present when watching starts are ignored, and
+    each new file is yielded once: later writes to it are not reported
+    again. A file counts as complete once its size has been stable for settle_time
+    seconds, so videos still being copied or rendered are not picked up
+    half written. Runs until interrupted.
+    """
+    folders = [os.path.normpath(folder) for folder in folders if os.path.isdir(folder)]
+    extensions = tuple(ext.lower() for ext in extensions)
+    seen = _scan(folders, extensions)
+    pending = {}  # path -> (last size, time the size last changed)
+
+    inotify = _open_inotify(folders)
+    if inotify:
+        print(f"Watching {len(folders)} folder(s) with inotify")
+    else:
+        print(f"Watching {len(folders)} folder(s) by polling every {poll_interval}s")
+
+    try:
+        while True:
+            if inotify:
+                changed = _read_inotify(*inotify, timeout=poll_interval)
+                if changed is None:
+                    print("Warning: inotify queue overflowed, rescanning watched folders.")
+                    changed = _scan(folders, extensions) - seen
+            else:
+                time.sleep(poll_interval)
+                changed = _scan(folders, extensions) - seen
+
+            now = time.monotonic()
+            for path in changed:
+                if path.lower().endswith(extensions) and path not in pending and path not in seen:
+                    pending[path] = (-1, now)
+
+            for path, (last_size, since) in list(pending.items()):
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    # Deleted or renamed away before it settled
+                    del pending[path]
+                    continue
+                if size != last_size:
+                    pending[path] = (size, now)
+                elif now - since >= settle_time and size > 0:
+                    del pending[path]
+                    seen.add(path)
+                    yield path
+    finally:
+        if inotify:
+            os.close(inotify[0])
@@ -0,0 +1,68 @@
+import os
+
+try:
+    import tomllib
+except ImportError:
+    # Python < 3.11: pip install tomli
+    import tomli as tomllib
+
+import frame_extractor
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frames_config.toml")
+
+CATEGORY_SETTINGS = ("frame_rate", "quality", "concurrency")
+
+
+def load_config(path=None):
+    """Load the frame extraction config and point frame_extractor at its ffmpeg.
+
+    The file is path, else $FRAMES_CONFIG, else frames_config.toml next to this
+    script. Returns a dict with ffmpeg, max_workers, threads_per_job and a list
+    of categories, each with its folders and extraction settings resolved.
+    """
+    path = path or os.environ.get("FRAMES_CONFIG") or DEFAULT_CONFIG_PATH
+    with open(path, 'rb') as f:
+        raw = tomllib.load(f)
+
+    base_dir = raw.get("base_dir", "")
+    defaults = {"frame_rate": 3, "quality": 2, "concurrency": 0}
+    defaults.update(raw.get("defaults", {}))
+
+    categories = []
+    for entry in raw.get("categories", []):
+        name = entry["name"]
+        category_dir = os.path.join(base_dir, name)
+        category = {
+            "name": name,
+            "dir": category_dir,
+            "video_dir": entry.get("video_dir", os.path.join(category_dir, "Video")),
+            "frames_dir": entry.get("frames_dir", os.path.join(category_dir, "Frames")),
+            "threads_dir": entry.get("threads_dir", os.path.join(category_dir, "Threads")),
+        }
+        for key in CATEGORY_SETTINGS:
+            category[key] = entry.get(key, defaults[key])
+        categories.append(category)
+
+    ffmpeg = frame_extractor.find_ffmpeg(raw.get("ffmpeg") or None)
+    frame_extractor.FFMPEG_PATH = ffmpeg
+    return {
+        "ffmpeg": ffmpeg,
+        "max_workers": raw.get("max_workers") or None,
+        "threads_per_job": raw.get("threads_per_job", frame_extractor.DEFAULT_THREADS_PER_JOB),
+        "categories": categories,
+    }
+
+
+def job_settings(category):
+    """extract_frames() settings for a category, tagged with its scheduling group."""
+    return {
+        "frame_rate": category["frame_rate"],
+        "quality": category["quality"],
+        "group": category["name"],
+    }
+
+
+def group_limits(config):
+    """Per-category concurrency limits for run_jobs()."""
+    return {category["name"]: category["concurrency"]
+            for category in config["categories"] if category["concurrency"]}
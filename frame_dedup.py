@@ -0,0 +1,221 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from file_io import load_json, save_json
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+# Hash index kept in the root of every deduplicated folder
+INDEX_NAME = "frames_phash_index.json"
+
+# Images are reduced to HASH_INPUT_SIZE x HASH_INPUT_SIZE grayscale and the
+# lowest HASH_SIZE x HASH_SIZE DCT coefficients form the 64-bit hash
+HASH_INPUT_SIZE = 32
+HASH_SIZE = 8
+
+# Hamming distance (out of 64 bits) at or below which two frames count as duplicates
+DEFAULT_THRESHOLD = 4
+
+BATCH_SIZE = 256
+
+# Candidate x kept distances computed at once when comparing frames
+COMPARE_ELEMENTS = 1 << 20
+
+# Number of set bits for every byte value, for vectorised popcounts
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II basis as an n x n matrix."""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT = _dct_matrix(HASH_INPUT_SIZE)[:HASH_SIZE]
+
+
+def _load_gray(path):
+    """Load an image as a small grayscale array, or None if it can't be read."""
+    try:
+        with Image.open(path) as img:
+            # Let the JPEG decoder downscale while decoding instead of afterwards
+            img.draft('L', (HASH_INPUT_SIZE * 2, HASH_INPUT_SIZE * 2))
+            img = img.convert('L').resize((HASH_INPUT_SIZE, HASH_INPUT_SIZE), Image.BILINEAR)
+            return np.asarray(img, dtype=np.float32)
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return None
+
+
+def phash_batch(pixels):
+    """Perceptual hashes for a stack of grayscale images, shape (N, 32, 32) -> (N,) uint64."""
+    # Low-frequency 8x8 DCT block of every image in one batched matrix product
+    coefficients = _DCT @ pixels @ _DCT.T
+    flat = coefficients.reshape(len(pixels), -1)
+    # Compare against the median of the AC terms so the DC term doesn't skew it
+    medians = np.median(flat[:, 1:], axis=1, keepdims=True)
+    bits = np.packbits(flat > medians, axis=1)
+    return bits.view('>u8').ravel().astype(np.uint64)
+
+
+def hash_files(paths, workers=None):
+    """Return {path: hash} for the readable images in paths."""
+    hashes = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(paths), BATCH_SIZE):
+            batch = paths[start:start + BATCH_SIZE]
+            loaded = [(path, pixels) for path, pixels in zip(batch, executor.map(_load_gray, batch))
+                      if pixels is not None]
+            if not loaded:
+                continue
+            values = phash_batch(np.stack([pixels for _, pixels in loaded]))
+            hashes.update((path, int(value)) for (path, _), value in zip(loaded, values))
+    return hashes
+
+
+def hamming_matrix(hashes, others):
+    """Hamming distances between every pair of two uint64 hash arrays, shape (len(hashes), len(others))."""
+    xor = np.bitwise_xor(hashes[:, None], others[None, :])
+    if hasattr(np, "bitwise_count"):
+        # numpy 2.0+
+        return np.bitwise_count(xor)
+    return _POPCOUNT[xor.view(np.uint8)].reshape(len(hashes), len(others), 8).sum(axis=2, dtype=np.uint8)
+
+
+def _list_images(root):
+    """Relative paths of all images below root, in a stable order."""
+    images = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                images.append(os.path.relpath(os.path.join(dirpath, filename), root))
+    return images
+
+
+def _match_candidates(candidates, kept, threshold):
+    """Match candidate hashes, in order, against the kept hashes and against each other.
+
+    For every candidate returns the position of its nearest kept hash within
+    threshold (earlier ones win ties), or None if nothing is that close. A
+    candidate matched to nothing is kept itself and numbered after the
+    hashes kept before it. Candidates are compared in blocks, each as one
+    (block x kept) distance matrix.
+    """
+    kept = np.asarray(kept, dtype=np.uint64)
+    matches = []
+    block_size = max(1, min(BATCH_SIZE, COMPARE_ELEMENTS // max(1, len(kept))))
+    for start in range(0, len(candidates), block_size):
+        block = np.asarray(candidates[start:start + block_size], dtype=np.uint64)
+        if len(kept):
+            distances = hamming_matrix(block, kept)
+            nearest = distances.argmin(axis=1)
+            nearest_distance = distances[np.arange(len(block)), nearest]
+        # Candidates kept earlier in this block aren't in `kept` yet
+        within = hamming_matrix(block, block)
+        block_kept = np.zeros(len(block), dtype=bool)
+        for i in range(len(block)):
+            best, best_distance = None, threshold + 1
+            if len(kept) and nearest_distance[i] <= threshold:
+                best, best_distance = int(nearest[i]), int(nearest_distance[i])
+            closer = np.flatnonzero(block_kept[:i] & (within[i, :i] < best_distance))
+            if len(closer):
+                j = closer[np.argmin(within[i, closer])]
+                best = len(kept) + int(np.count_nonzero(block_kept[:j]))
+            if best is None:
+                block_kept[i] = True
+            matches.append(best)
+        kept = np.concatenate([kept, block[block_kept]])
+    return matches
+
+
+def dedup_folder(root, threshold=DEFAULT_THRESHOLD, action="link"):
+    """Find near-identical frames below root and hard-link or delete the duplicates.
+
+    Hashes are cached in root/frames_phash_index.json keyed by relative path,
+    size and mtime, together with whether each frame was kept or which frame
+    it duplicates. Reruns only hash new frames and compare those against the
+    frames kept so far. The first copy of a frame (already kept frames first,
+    then in path order) is kept. With action="link" every duplicate becomes a
+    hard link to that copy; with action="delete" it is removed.
+    Returns the number of duplicates handled.
+    """
+    if action not in ("link", "delete"):
+        raise ValueError(f"Unknown dedup action '{action}'")
+    if not os.path.isdir(root):
+        print(f"Error: Folder '{root}' not found.")
+        return 0
+
+    index_path = os.path.join(root, INDEX_NAME)
+    index = load_json(index_path)
+    images = _list_images(root)
+    present = set(images)
+    # Forget frames that were deleted since the last run
+    index = {path: entry for path, entry in index.items() if path in present}
+
+    stats = {path: os.stat(os.path.join(root, path)) for path in images}
+    stale = [path for path in images
+             if path not in index
+             or index[path]["size"] != stats[path].st_size
+             or index[path]["mtime_ns"] != stats[path].st_mtime_ns]
+    print(f"Hashing {len(stale)} new or changed frame(s) in {root}")
+    new_hashes = hash_files([os.path.join(root, path) for path in stale])
+    for path in stale:
+        full_path = os.path.join(root, path)
+        if full_path in new_hashes:
+            index[path] = {
+                "size": stats[path].st_size,
+                "mtime_ns": stats[path].st_mtime_ns,
+                "hash": format(new_hashes[full_path], '016x'),
+            }
+        else:
+            index.pop(path, None)
+
+    # Frames kept by earlier runs stay kept; everything else is compared against them.
+    # That includes indexes from before decisions were stored and duplicates whose
+    # original has since been deleted.
+    stale = set(stale)
+    kept_paths = sorted(path for path, entry in index.items() if path not in stale and entry.get("kept"))
+    kept_set = set(kept_paths)
+    candidates = sorted((path for path, entry in index.items()
+                         if path in stale or "kept" not in entry
+                         or (not entry["kept"] and entry.get("duplicate_of") not in kept_set)),
+                        key=lambda path: (path in stale, path))
+    kept_hashes = [int(index[path]["hash"], 16) for path in kept_paths]
+    matches = _match_candidates([int(index[path]["hash"], 16) for path in candidates], kept_hashes, threshold)
+
+    duplicates = 0
+    for path, match in zip(candidates, matches):
+        if match is None:
+            index[path]["kept"] = True
+            index[path].pop("duplicate_of", None)
+            kept_paths.append(path)
+            continue
+        kept_path = kept_paths[match]
+        original = os.path.join(root, kept_path)
+        duplicate = os.path.join(root, path)
+        index[path].update(kept=False, duplicate_of=kept_path)
+        if os.path.samefile(original, duplicate):
+            continue
+        duplicates += 1
+        if action == "delete":
+            os.remove(duplicate)
+            del index[path]
+        else:
+            temp_link = duplicate + ".link"
+            os.link(original, temp_link)
+            os.replace(temp_link, duplicate)
+            stat = os.stat(duplicate)
+            index[path] = dict(index[kept_path], size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+                               kept=False, duplicate_of=kept_path)
+
+    save_json(index_path, index, indent=1)
+    verb = "Deleted" if action == "delete" else "Hard-linked"
+    print(f"{verb} {duplicates} duplicate frame(s) in {root}; {len(kept_paths)} unique frame(s) remain.")
+    return duplicates
@@ -0,0 +1,796 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tarfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import zipfile
+from datetime import date, datetime
+
+from file_io import ffmpeg_output, load_json, save_json
+from folder_watch import iter_new_files
+
+# Where ffmpeg was installed on the Windows machine before it was on PATH
+WINDOWS_FFMPEG_PATH = "C:\\ffmpeg\\bin\\ffmpeg.exe"
+
+# Threads handed to each ffmpeg process; the pool is sized so that
+# workers * threads roughly matches the number of cores
+DEFAULT_THREADS_PER_JOB = 2
+
+VIDEO_EXTENSIONS = ('.mp4',)
+
+# How frames are picked from the video:
+#   fps      - decode everything and keep frame_rate frames per second
+#   keyframe - decode only keyframes (-skip_frame nokey), frame_rate is ignored
+#   seek     - one input-side -ss seek per sample, spread over a worker pool
+#   scene    - keep frames whose scene-change score exceeds a threshold
+SAMPLING_MODES = ("fps", "keyframe", "seek", "scene")
+
+DEFAULT_SCENE_THRESHOLD = 0.3
+
+# Frame file formats. npy writes raw RGB frames as memory-mappable
+# (frames, height, width, 3) uint8 stacks of chunk_size frames each.
+OUTPUT_FORMATS = ("jpg", "webp", "png", "npy")
+
+# Archives that loose image frames can be packed into, chunk_size frames each
+CONTAINERS = ("tar", "zip")
+
+DEFAULT_CHUNK_SIZE = 500
+
+# libwebp quality (0-100) used for webp frames
+WEBP_QUALITY = 90
+
+# Six digits keeps frames sorted by name well past 9999 frames
+FRAME_NAME = "frame_%06d"
+
+# Per-folder record of what has already been extracted
+MANIFEST_NAME = "frames_manifest.json"
+
+# Bytes read from the start, middle and end of a video for its fast hash
+HASH_SAMPLE_SIZE = 1024 * 1024
+
+# Seconds between progress lines for a running job
+PROGRESS_INTERVAL = 5.0
+
+# Lines of ffmpeg's stderr kept for error reports
+STDERR_TAIL_LINES = 40
+
+_print_lock = threading.Lock()
+_manifest_lock = threading.Lock()
+
+
+def log(message):
+    """Print a message without interleaving output from concurrent jobs."""
+    with _print_lock:
+        print(message, flush=True)
+
+
+def find_ffmpeg(configured=None):
+    """Locate ffmpeg: the configured path, then PATH, then the old Windows location."""
+    if configured:
+        return configured
+    on_path = shutil.which("ffmpeg")
+    if on_path:
+        return on_path
+    if os.path.exists(WINDOWS_FFMPEG_PATH):
+        return WINDOWS_FFMPEG_PATH
+    return "ffmpeg"
+
+
+# ffmpeg used by every job; frame_config.load_config() may replace it
+FFMPEG_PATH = find_ffmpeg()
+
+
+def default_workers(threads_per_job=DEFAULT_THREADS_PER_JOB):
+    """Number of ffmpeg jobs to run at once for this machine."""
+    cores = os.cpu_count() or 1
+    return max(1, cores // max(1, threads_per_job))
+
+
+def list_videos(video_dir, extensions=VIDEO_EXTENSIONS):
+    """Return the video file names in a directory, or None if it cannot be read."""
+    try:
+        return sorted(f for f in os.listdir(video_dir) if f.lower().endswith(extensions))
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        return None
+
+
+def dated_output_dir(frames_dir, video_path):
+    """Subfolder of frames_dir named after today's date and the video name."""
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+    today_date = date.today().strftime("%Y-%m-%d")
+    return os.path.join(frames_dir, f"{today_date}_{video_name}")
+
+
+def manifest_path_for(frames_dir):
+    """Location of the extraction manifest for a frames folder."""
+    return os.path.join(frames_dir, MANIFEST_NAME)
+
+
+def fast_hash(video_path, size=None):
+    """Hash the size plus the first, middle and last MiB of a file.
+
+    Cheap enough to run on every changed video, and catches re-encodes that
+    keep the same size, which a plain size/mtime check would miss.
+    """
+    if size is None:
+        size = os.path.getsize(video_path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(video_path, 'rb') as f:
+        for offset in (0, max(0, size // 2 - HASH_SAMPLE_SIZE // 2), max(0, size - HASH_SAMPLE_SIZE)):
+            f.seek(offset)
+            digest.update(f.read(HASH_SAMPLE_SIZE))
+    return digest.hexdigest()
+
+
+def check_manifest(manifest_path, video_path, settings):
+    """Return the output folder of a previous identical extraction, or None.
+
+    Unchanged videos are recognised from size and mtime alone; the content
+    hash is only computed when the mtime moved but the size did not.
+    """
+    key = os.path.abspath(video_path)
+    stat = os.stat(video_path)
+    with _manifest_lock:
+        manifest = load_json(manifest_path)
+        entry = manifest.get(key)
+        if not entry or entry.get("settings") != settings:
+            return None
+        if not os.path.isdir(entry.get("output_dir", "")):
+            return None
+        if entry.get("size") != stat.st_size:
+            return None
+        if entry.get("mtime_ns") != stat.st_mtime_ns:
+            if entry.get("hash") != fast_hash(video_path, stat.st_size):
+                return None
+            # Touched but not modified: remember the new mtime
+            entry["mtime_ns"] = stat.st_mtime_ns
+            save_json(manifest_path, manifest, indent=2)
+        return entry["output_dir"]
+
+
+def record_manifest(manifest_path, video_path, output_dir, settings):
+    """Store a successful extraction in the manifest."""
+    key = os.path.abspath(video_path)
+    stat = os.stat(video_path)
+    entry = {
+        "source": key,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": fast_hash(video_path, stat.st_size),
+        "settings": settings,
+        "output_dir": os.path.abspath(output_dir),
+    }
+    with _manifest_lock:
+        manifest = load_json(manifest_path)
+        manifest[key] = entry
+        save_json(manifest_path, manifest, indent=2)
+
+
+def parse_output_spec(spec):
+    """Turn "3" or "3@512" (fps, optionally @width) into an output description."""
+    rate, _, width = spec.strip().partition("@")
+    frame_rate = float(rate) if "." in rate else int(rate)
+    output = {"name": f"{rate}fps", "frame_rate": frame_rate, "width": None}
+    if width:
+        output["width"] = int(width)
+        output["name"] += f"_{width}px"
+    return output
+
+
+def _output_filter(frame_rate, width=None):
+    """Filter chain producing one output stream."""
+    chain = f"fps={frame_rate}"
+    if width:
+        # -2 keeps the aspect ratio with an even height
+        chain += f",scale={width}:-2"
+    return chain
+
+
+def scene_select_filter(threshold=DEFAULT_SCENE_THRESHOLD, min_interval=None, max_interval=None):
+    """select filter keeping scene changes, at most one per min_interval seconds.
+
+    The first frame is always kept, and with max_interval a frame is also
+    kept whenever that many seconds pass without a scene change, so long
+    static shots are still represented.
+    """
+    since_last = "t-prev_selected_t"
+    scene = f"gt(scene,{threshold})"
+    if min_interval:
+        scene += f"*gte({since_last},{min_interval})"
+    terms = ["isnan(prev_selected_t)", scene]
+    if max_interval:
+        terms.append(f"gte({since_last},{max_interval})")
+    # gt(...,0) collapses the sum to 1 so every kept frame goes to the single output
+    return f"select='gt({'+'.join(terms)},0)'"
+
+
+def image_output_options(output_format="jpg", quality=2):
+    """ffmpeg encoder options for one image format."""
+    if output_format == "webp":
+        return ["-c:v", "libwebp", "-quality", str(WEBP_QUALITY)]
+    if output_format == "png":
+        # Lossless
+        return ["-c:v", "png"]
+    return ["-q:v", str(quality)]  # Quality
+
+
+def build_ffmpeg_command(video_path, output_dir, frame_rate=3, quality=2, threads=None, outputs=None,
+                         sampling="fps", scene_threshold=DEFAULT_SCENE_THRESHOLD, min_interval=None,
+                         max_interval=None, output_format="jpg"):
+    """Build the ffmpeg command line for an extraction job.
+
+    With outputs, the video is decoded once and a split filter graph feeds
+    every requested rate/size into its own subfolder of output_dir.
+    """
+    pattern = f"{FRAME_NAME}.{output_format}"
+    output_options = image_output_options(output_format, quality)
+    if threads:
+        output_options += ["-threads", str(threads)]
+
+    cmd = [FFMPEG_PATH, "-hide_banner", "-nostdin"]
+    if threads:
+        cmd += ["-threads", str(threads)]
+    if sampling == "keyframe":
+        # The decoder drops every non-key frame before it is decoded
+        cmd += ["-skip_frame", "nokey"]
+    cmd += ["-i", video_path]
+
+    if sampling in ("keyframe", "scene"):
+        if sampling == "scene":
+            cmd += ["-vf", scene_select_filter(scene_threshold, min_interval, max_interval)]
+        cmd += ["-vsync", "vfr"] + output_options
+        cmd.append(os.path.join(output_dir, pattern))
+        return cmd
+
+    if not outputs:
+        cmd += ["-vf", _output_filter(frame_rate)]  # Frame rate (frames per second)
+        cmd += output_options
+        cmd.append(os.path.join(output_dir, pattern))
+        return cmd
+
+    labels = "".join(f"[s{i}]" for i in range(len(outputs)))
+    graph = [f"[0:v]split={len(outputs)}{labels}"]
+    for i, output in enumerate(outputs):
+        graph.append(f"[s{i}]{_output_filter(output['frame_rate'], output.get('width'))}[o{i}]")
+    cmd += ["-filter_complex", ";".join(graph)]
+    for i, output in enumerate(outputs):
+        cmd += ["-map", f"[o{i}]"] + output_options
+        cmd.append(os.path.join(output_dir, output["name"], pattern))
+    return cmd
+
+
+def _read_progress(progress, metrics):
+    """Copy the numbers from one ffmpeg -progress block into metrics."""
+    out_time = progress.get("out_time_us") or progress.get("out_time_ms")
+    if out_time and out_time.lstrip("-").isdigit():
+        metrics["out_time"] = int(out_time) / 1_000_000
+    if progress.get("frame", "").isdigit():
+        metrics["ffmpeg_frames"] = int(progress["frame"])
+    speed = progress.get("speed", "").rstrip("x")
+    try:
+        metrics["speed"] = float(speed)
+    except ValueError:
+        pass
+
+
+def _run_ffmpeg(cmd, video_path, metrics=None, duration=None, show_progress=True):
+    """Run one ffmpeg command, reporting progress and failures. Returns True on success.
+
+    Progress comes from ffmpeg's -progress output, parsed as it arrives, and is
+    stored in metrics. stderr is drained on a separate thread and only its last
+    lines are kept, for the error report.
+    """
+    if metrics is None:
+        metrics = {}
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats"] + cmd[1:]
+    try:
+        process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, errors="replace")
+    except FileNotFoundError:
+        log(f"Error: FFmpeg executable not found at {FFMPEG_PATH}.")
+        return False
+
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    drain = threading.Thread(target=lambda: stderr_tail.extend(line.rstrip() for line in process.stderr),
+                             daemon=True)
+    drain.start()
+
+    name = os.path.basename(video_path)
+    progress = {}
+    last_report = time.monotonic()
+    for line in process.stdout:
+        key, _, value = line.strip().partition("=")
+        progress[key] = value
+        if key != "progress":
+            continue
+        _read_progress(progress, metrics)
+        now = time.monotonic()
+        if show_progress and value != "end" and now - last_report >= PROGRESS_INTERVAL:
+            last_report = now
+            done = ""
+            if duration and "out_time" in metrics:
+                done = f"{min(100.0, 100 * metrics['out_time'] / duration):.0f}% "
+            log(f"{name}: {done}frame={metrics.get('ffmpeg_frames', 0)} speed={metrics.get('speed', 0):g}x")
+        progress = {}
+
+    returncode = process.wait()
+    drain.join()
+    if returncode != 0:
+        metrics["ffmpeg_stderr"] = list(stderr_tail)
+        log(f"FFmpeg error for {video_path} (exit code {returncode}):\n" + "\n".join(stderr_tail))
+        return False
+    return True
+
+
+def _folder_totals(folder):
+    """Number of files and total bytes below folder."""
+    files = 0
+    size = 0
+    for dirpath, _, filenames in os.walk(folder):
+        for filename in filenames:
+            files += 1
+            size += os.path.getsize(os.path.join(dirpath, filename))
+    return files, size
+
+
+def extract_frames(video_path, output_dir, frame_rate=3, quality=2, threads=None,
+                   manifest_path=None, force=False, outputs=None, sampling="fps",
+                   scene_threshold=DEFAULT_SCENE_THRESHOLD, min_interval=None, max_interval=None, metrics=None,
+                   output_format="jpg", container=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Extract frames from a video into output_dir using FFmpeg.
+
+    With a manifest_path, a video already extracted with the same settings is
+    skipped unless force is set. outputs is a list of parse_output_spec()
+    dicts; when given, frame_rate is ignored and each output gets its own
+    subfolder, all written from a single decode. sampling is one of
+    SAMPLING_MODES; keyframe and seek avoid decoding every frame of long
+    videos but only support a single output. scene sampling keeps a frame
+    when the scene-change score exceeds scene_threshold, spaced at least
+    min_interval and at most max_interval seconds apart.
+
+    output_format is one of OUTPUT_FORMATS; npy only works with plain fps
+    sampling. container packs the image frames into tar or zip archives of
+    chunk_size frames once extraction finishes.
+
+    If a metrics dict is passed it is filled with the job's wall time, frames
+    and bytes written, decode rate and, on failure, ffmpeg's last stderr lines.
+    """
+    start = time.monotonic()
+    if metrics is None:
+        metrics = {}
+    metrics.update(video_path=video_path, output_dir=output_dir, sampling=sampling,
+                   success=False, skipped=False)
+    log(f"Processing video: {video_path}")
+
+    # Check if video file exists
+    if not os.path.exists(video_path):
+        log(f"Error: Video file '{video_path}' does not exist.")
+        return False
+
+    if sampling not in SAMPLING_MODES:
+        log(f"Error: Unknown sampling mode '{sampling}'. Use one of: {', '.join(SAMPLING_MODES)}.")
+        return False
+    if outputs and sampling != "fps":
+        log(f"Error: Multiple outputs are only supported with fps sampling, not '{sampling}'.")
+        return False
+    if output_format not in OUTPUT_FORMATS:
+        log(f"Error: Unknown output format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}.")
+        return False
+    if output_format == "npy" and (outputs or sampling != "fps" or container):
+        log("Error: npy output only supports fps sampling with a single output and no container.")
+        return False
+    if container and container not in CONTAINERS:
+        log(f"Error: Unknown container '{container}'. Use one of: {', '.join(CONTAINERS)}.")
+        return False
+
+    settings = {"frame_rate": frame_rate, "quality": quality}
+    if outputs:
+        settings = {"outputs": outputs, "quality": quality}
+    if sampling != "fps":
+        settings["sampling"] = sampling
+    if sampling == "scene":
+        settings.pop("frame_rate")
+        settings.update(scene_threshold=scene_threshold, min_interval=min_interval, max_interval=max_interval)
+    if output_format != "jpg":
+        settings["output_format"] = output_format
+    if container or output_format == "npy":
+        settings.update(container=container, chunk_size=chunk_size)
+    if manifest_path and not force:
+        previous_output = check_manifest(manifest_path, video_path, settings)
+        if previous_output:
+            log(f"Up to date, skipping: {video_path} (frames in '{previous_output}')")
+            metrics.update(success=True, skipped=True, output_dir=previous_output,
+                           wall_seconds=round(time.monotonic() - start, 3))
+            return True
+
+    # Clear existing output folder if it exists
+    if os.path.exists(output_dir):
+        log(f"Clearing existing output folder: {output_dir}")
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+    for output in outputs or []:
+        os.makedirs(os.path.join(output_dir, output["name"]))
+
+    info = probe_video(video_path) or {}
+    metrics["source_duration"] = info.get("duration")
+    frames = None
+    if output_format == "npy":
+        frames = _write_npy_chunks(video_path, output_dir, frame_rate, threads, chunk_size)
+        success = frames is not None
+    elif sampling == "seek":
+        success = _extract_by_seeking(video_path, output_dir, frame_rate, quality, threads, info, output_format)
+    else:
+        cmd = build_ffmpeg_command(video_path, output_dir, frame_rate, quality, threads, outputs, sampling,
+                                   scene_threshold, min_interval, max_interval, output_format)
+        log(f"FFmpeg command: {' '.join(cmd)}")
+        success = _run_ffmpeg(cmd, video_path, metrics, info.get("duration"))
+    if frames is None:
+        # Loose image files, counted before they are packed into archives
+        frames = _folder_totals(output_dir)[0]
+    if success and container:
+        pack_frames(output_dir, container, chunk_size)
+
+    wall = time.monotonic() - start
+    size = _folder_totals(output_dir)[1]
+    metrics.update(success=success, wall_seconds=round(wall, 3), frames_written=frames, bytes_written=size)
+    # Source frames decoded per second; keyframe and seek modes only decode a few of them
+    if sampling not in ("seek", "keyframe") and metrics.get("out_time") and info.get("fps") and wall > 0:
+        metrics["decode_fps"] = round(metrics["out_time"] * info["fps"] / wall, 1)
+    if not success:
+        return False
+
+    if manifest_path:
+        record_manifest(manifest_path, video_path, output_dir, settings)
+    rate = f", decode {metrics['decode_fps']:g} fps" if "decode_fps" in metrics else ""
+    log(f"Frames extracted to '{output_dir}' ({frames} frames, {size / 1_048_576:.1f} MB, {wall:.1f}s{rate}).")
+    return True
+
+
+def probe_video(video_path):
+    """Return width, height, fps and duration of a video, or None if it can't be read.
+
+    Parsed from the stream summary ffmpeg prints for its input, so no separate
+    ffprobe binary is needed. Width and height are as displayed, after rotation.
+    """
+    try:
+        result = subprocess.run([FFMPEG_PATH, "-hide_banner", "-nostdin", "-i", video_path],
+                                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                text=True, errors="replace")
+    except FileNotFoundError:
+        log(f"Error: FFmpeg executable not found at {FFMPEG_PATH}.")
+        return None
+
+    stream = re.search(r"Stream #\d+:\d+.*?: Video: .*?(\d{2,5})x(\d{2,5})", result.stderr)
+    if not stream:
+        return None
+    width, height = int(stream.group(1)), int(stream.group(2))
+    rotation = re.search(r"rotation of (-?[\d.]+) degrees", result.stderr)
+    if rotation and round(abs(float(rotation.group(1)))) % 180 == 90:
+        width, height = height, width
+
+    fps = re.search(r"([\d.]+) fps", result.stderr)
+    duration = re.search(r"Duration: (\d+):(\d+):([\d.]+)", result.stderr)
+    seconds = None
+    if duration:
+        hours, minutes, secs = duration.groups()
+        seconds = int(hours) * 3600 + int(minutes) * 60 + float(secs)
+    return {
+        "width": width,
+        "height": height,
+        "fps": float(fps.group(1)) if fps else None,
+        "duration": seconds,
+    }
+
+
+def _extract_by_seeking(video_path, output_dir, frame_rate, quality, workers=None, info=None, output_format="jpg"):
+    """Grab one frame per 1/frame_rate seconds with a separate input-side seek each.
+
+    Each seek only decodes from the nearest preceding keyframe, so for sparse
+    sampling of long videos most of the stream is never decoded. The seeks are
+    independent single-threaded ffmpeg runs spread over `workers` threads.
+    """
+    info = info or probe_video(video_path)
+    if not info or not info["duration"]:
+        log(f"Error: Could not read the duration of '{video_path}'.")
+        return False
+    timestamps = []
+    t = 0.0
+    while t < info["duration"]:
+        timestamps.append(t)
+        t = len(timestamps) / frame_rate
+    workers = workers or default_workers(1)
+    log(f"Seeking {len(timestamps)} frame(s) from {video_path} with {workers} worker(s)")
+
+    def grab(index):
+        cmd = [
+            FFMPEG_PATH, "-hide_banner", "-nostdin", "-loglevel", "error",
+            "-ss", f"{timestamps[index]:.3f}",
+            "-threads", "1",
+            "-i", video_path,
+            "-frames:v", "1",
+        ] + image_output_options(output_format, quality) + [
+            "-update", "1",
+            os.path.join(output_dir, f"{FRAME_NAME % (index + 1)}.{output_format}"),
+        ]
+        return _run_ffmpeg(cmd, video_path, show_progress=False)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return all(executor.map(grab, range(len(timestamps))))
+
+
+def _write_npy_chunks(video_path, output_dir, frame_rate, threads=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream raw RGB frames into .npy stacks of chunk_size frames.
+
+    Each stack is written through a memory map, so the frames are never held
+    in memory as a whole, and can be read back the same way with
+    numpy.load(path, mmap_mode='r'). A chunk is named after its first frame.
+    Returns the number of frames written, or None on failure.
+    """
+    import numpy as np
+
+    chunk = None
+    filled = 0
+    chunk_start = 1
+    try:
+        for index, (_, frame) in enumerate(iter_frames(video_path, frame_rate, threads=threads)):
+            if chunk is None:
+                path = os.path.join(output_dir, f"{FRAME_NAME % chunk_start}.npy")
+                chunk = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8,
+                                                  shape=(chunk_size,) + frame.shape)
+            chunk[filled] = frame
+            filled += 1
+            if filled == chunk_size:
+                chunk.flush()
+                chunk = None
+                filled = 0
+                chunk_start = index + 2
+    except RuntimeError as e:
+        log(str(e))
+        return None
+    finally:
+        if chunk is not None:
+            chunk.flush()
+            del chunk
+
+    if filled:
+        # Rewrite the last, partly filled chunk at its real length
+        path = os.path.join(output_dir, f"{FRAME_NAME % chunk_start}.npy")
+        np.save(path + ".tmp.npy", np.load(path, mmap_mode='r')[:filled])
+        os.replace(path + ".tmp.npy", path)
+    return chunk_start - 1 + filled
+
+
+def pack_frames(output_dir, container="tar", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Replace the loose frame images in output_dir (and its output subfolders) with archives.
+
+    Frames are stored uncompressed, chunk_size per archive, in name order, so
+    a chunk can be read back with one sequential read. Archives are named
+    after the first and last frame they hold.
+    """
+    for dirpath, _, filenames in os.walk(output_dir):
+        frames = sorted(f for f in filenames if f.startswith("frame_") and not f.endswith((".tar", ".zip", ".npy")))
+        for start in range(0, len(frames), chunk_size):
+            batch = frames[start:start + chunk_size]
+            first, last = os.path.splitext(batch[0])[0], os.path.splitext(batch[-1])[0]
+            archive_path = os.path.join(dirpath, f"{first}-{last[len('frame_'):]}.{container}")
+            if container == "zip":
+                with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+                    for name in batch:
+                        archive.write(os.path.join(dirpath, name), name)
+            else:
+                with tarfile.open(archive_path, 'w') as archive:
+                    for name in batch:
+                        archive.add(os.path.join(dirpath, name), arcname=name)
+            for name in batch:
+                os.remove(os.path.join(dirpath, name))
+
+
+def iter_frames(video_path, frame_rate=3, width=None, pix_fmt="rgb24", threads=None, copy=False):
+    """Yield (timestamp, frame) pairs decoded straight from ffmpeg's stdout.
+
+    Frames are NumPy uint8 arrays of shape (height, width, 3) for rgb24 or
+    (height, width) for gray, sampled with the same fps filter as
+    extract_frames() but never encoded to JPEG or written to disk. The same
+    buffer is refilled for every frame, so pass copy=True (or copy it
+    yourself) to keep a frame past the next iteration.
+    """
+    import numpy as np
+
+    channels = {"rgb24": 3, "gray": 1}[pix_fmt]
+    info = probe_video(video_path)
+    if not info:
+        raise RuntimeError(f"Could not read video stream from '{video_path}'")
+    out_width, out_height = info["width"], info["height"]
+    if width:
+        # Work out the scaled height ourselves so the frame size is known exactly
+        out_height = max(2, int(round(out_height * width / out_width / 2)) * 2)
+        out_width = width
+
+    cmd = [FFMPEG_PATH, "-hide_banner", "-nostdin", "-loglevel", "error"]
+    if threads:
+        cmd += ["-threads", str(threads)]
+    cmd += [
+        "-i", video_path,
+        "-vf", f"fps={frame_rate},scale={out_width}:{out_height}",
+        "-f", "rawvideo", "-pix_fmt", pix_fmt,
+        "pipe:1",
+    ]
+
+    shape = (out_height, out_width, channels) if channels > 1 else (out_height, out_width)
+    buffer = np.empty(shape, dtype=np.uint8)
+    view = memoryview(buffer).cast("B")
+    frame_size = len(view)
+
+    with ffmpeg_output(cmd, video_path, bufsize=frame_size) as stdout:
+        index = 0
+        while True:
+            filled = 0
+            while filled < frame_size:
+                count = stdout.readinto(view[filled:])
+                if not count:
+                    break
+                filled += count
+            if filled < frame_size:
+                break
+            yield index / frame_rate, buffer.copy() if copy else buffer
+            index += 1
+
+
+def write_report(report_path, jobs, started, wall_seconds, max_workers, threads_per_job):
+    """Write a JSON run report from the jobs' metrics dicts, with run totals."""
+    report = {
+        "started": started,
+        "wall_seconds": round(wall_seconds, 3),
+        "max_workers": max_workers,
+        "threads_per_job": threads_per_job,
+        "totals": {
+            "jobs": len(jobs),
+            "succeeded": sum(1 for m in jobs if m.get("success")),
+            "skipped": sum(1 for m in jobs if m.get("skipped")),
+            "failed": sum(1 for m in jobs if not m.get("success")),
+            "frames_written": sum(m.get("frames_written", 0) for m in jobs),
+            "bytes_written": sum(m.get("bytes_written", 0) for m in jobs),
+            "busy_seconds": round(sum(m.get("wall_seconds", 0) for m in jobs), 3),
+        },
+        "jobs": jobs,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    log(f"Run report written to '{report_path}'.")
+
+
+def run_jobs(jobs, max_workers=None, threads_per_job=DEFAULT_THREADS_PER_JOB, group_limits=None,
+             report_path=None):
+    """Run extraction jobs concurrently and return (job, success) pairs in job order.
+
+    Each job is a dict of extract_frames() keyword arguments and must contain
+    video_path and output_dir. Every worker thread blocks on one ffmpeg process,
+    so max_workers bounds the number of ffmpeg processes alive at once.
+
+    A job may also carry a "group" name (such as its category); group_limits
+    maps group names to the most jobs of that group allowed to run at once.
+    Jobs held back by their group limit wait without occupying a worker.
+
+    With report_path, per-job metrics (see extract_frames) and run totals are
+    written there as JSON.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    if max_workers is None:
+        max_workers = default_workers(threads_per_job)
+    max_workers = max(1, min(max_workers, len(jobs)))
+    group_limits = group_limits or {}
+    log(f"Running {len(jobs)} job(s) with {max_workers} worker(s), "
+        f"{threads_per_job} thread(s) per job")
+
+    started = datetime.now().isoformat(timespec="seconds")
+    run_start = time.monotonic()
+    results = [None] * len(jobs)
+    job_metrics = [{} for _ in jobs]
+    waiting = list(range(len(jobs)))
+    running = {}  # future -> job index
+    running_per_group = {}
+
+    def can_start(index):
+        group = jobs[index].get("group")
+        limit = group_limits.get(group)
+        return not limit or running_per_group.get(group, 0) < limit
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while waiting or running:
+            # Start as many waiting jobs as the pool and group limits allow
+            for index in list(waiting):
+                if len(running) >= max_workers:
+                    break
+                if not can_start(index):
+                    continue
+                waiting.remove(index)
+                kwargs = dict(jobs[index])
+                group = kwargs.pop("group", None)
+                running_per_group[group] = running_per_group.get(group, 0) + 1
+                kwargs.setdefault("threads", threads_per_job)
+                kwargs["metrics"] = job_metrics[index]
+                running[executor.submit(extract_frames, **kwargs)] = index
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                group = jobs[index].get("group")
+                running_per_group[group] -= 1
+                try:
+                    success = future.result()
+                except Exception as e:
+                    log(f"Unexpected error processing {jobs[index]['video_path']}: {e}")
+                    success = False
+                results[index] = (jobs[index], success)
+
+    succeeded = sum(1 for _, success in results if success)
+    log(f"Completed {succeeded} out of {len(jobs)} job(s) successfully.")
+    if report_path:
+        write_report(report_path, job_metrics, started, time.monotonic() - run_start, max_workers, threads_per_job)
+    return results
+
+
+def watch_and_extract(video_folders, make_job, max_workers=None, threads_per_job=DEFAULT_THREADS_PER_JOB,
+                      settle_time=5.0, group_limits=None):
+    """Extract frames from every new video that lands in video_folders until interrupted.
+
+    make_job(video_path) returns the extract_frames() keyword arguments for a
+    finished video, or None to ignore it. Jobs share one bounded worker pool
+    and respect group_limits, the same way run_jobs() does: a job over its
+    group's limit waits in a queue, and the worker finishing a job of that
+    group runs it next.
+    """
+    if max_workers is None:
+        max_workers = default_workers(threads_per_job)
+    group_limits = group_limits or {}
+    log(f"Watch mode: {max_workers} worker(s), {threads_per_job} thread(s) per job. Press Ctrl+C to stop.")
+
+    lock = threading.Lock()
+    running_per_group = {}
+    queued = {}  # group -> deque of jobs held back by its limit
+
+    def run(job):
+        while job:
+            kwargs = dict(job)
+            group = kwargs.pop("group", None)
+            try:
+                if extract_frames(**kwargs):
+                    log(f"Extraction completed successfully for {os.path.basename(job['video_path'])}!")
+                else:
+                    log(f"Extraction failed for {os.path.basename(job['video_path'])}. See errors above for details.")
+            except Exception as e:
+                log(f"Unexpected error processing {job['video_path']}: {e}")
+            # Run the group's next held-back job on this worker, or give its slot back
+            with lock:
+                job = queued[group].popleft() if queued.get(group) else None
+                if job is None:
+                    running_per_group[group] -= 1
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for video_path in iter_new_files(video_folders, VIDEO_EXTENSIONS, settle_time=settle_time):
+                job = make_job(video_path)
+                if job is None:
+                    continue
+                job.setdefault("threads", threads_per_job)
+                log(f"New video ready: {video_path}")
+                group = job.get("group")
+                limit = group_limits.get(group)
+                with lock:
+                    if limit and running_per_group.get(group, 0) >= limit:
+                        queued.setdefault(group, deque()).append(job)
+                        log(f"Waiting for a '{group}' job to finish before starting {os.path.basename(video_path)}")
+                        continue
+                    running_per_group[group] = running_per_group.get(group, 0) + 1
+                executor.submit(run, job)
+        except KeyboardInterrupt:
+            log("Stopping watch; waiting for running and queued extractions to finish...")
@@ -0,0 +1,161 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+
+# Folders the Markdown scripts write to: pdf_to_md.py, whisper_transcribe.py and today_date.py
+DEFAULT_FOLDERS = [
+    r"C:\Users\felix\Scripts\MD",
+    r"C:\Users\felix\Documents\Obisdian\Knowledge\SOPs",
+    "C:/Users/felix/Obsidian/Felix",
+]
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "notes_index.db")
+
+NOTE_EXTENSIONS = ('.md',)
+
+# Title matches count this many times more than body matches when ranking
+TITLE_WEIGHT = 10.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    note_id INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes USING fts5(title, body, tokenize='unicode61 remove_diacritics 2');
+"""
+
+
+def open_index(db_path=DEFAULT_DB):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _iter_notes(folder):
+    for dirpath, dirnames, filenames in os.walk(folder):
+        # Skip Obsidian's own config and trash folders
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for filename in filenames:
+            if filename.lower().endswith(NOTE_EXTENSIONS):
+                yield os.path.join(dirpath, filename)
+
+
+def _under(path, folders):
+    return any(path == folder or path.startswith(folder.rstrip(os.sep) + os.sep) for folder in folders)
+
+
+def update_index(conn, folders):
+    """Bring the index up to date with the notes in folders.
+
+    Files whose size and mtime match the index are skipped without being
+    read; a changed mtime with the same content hash only updates the
+    record. Notes deleted from these folders are dropped from the index.
+    Returns (added or changed, removed, unchanged) counts.
+    """
+    folders = [os.path.abspath(folder) for folder in folders if os.path.isdir(folder)]
+    known = {row[0]: row[1:] for row in conn.execute("SELECT path, size, mtime_ns, sha256, note_id FROM files")}
+    seen = set()
+    changed = unchanged = 0
+
+    with conn:
+        for folder in folders:
+            for path in _iter_notes(folder):
+                seen.add(path)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                record = known.get(path)
+                if record and record[0] == stat.st_size and record[1] == stat.st_mtime_ns:
+                    unchanged += 1
+                    continue
+                try:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                except OSError as e:
+                    print(f"Error reading {path}: {e}")
+                    continue
+                digest = hashlib.sha256(data).hexdigest()
+                if record and record[2] == digest:
+                    conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                                 (stat.st_size, stat.st_mtime_ns, path))
+                    unchanged += 1
+                    continue
+                if record:
+                    conn.execute("DELETE FROM notes WHERE rowid = ?", (record[3],))
+                title = os.path.splitext(os.path.basename(path))[0]
+                cursor = conn.execute("INSERT INTO notes (title, body) VALUES (?, ?)",
+                                      (title, data.decode('utf-8', errors='replace')))
+                conn.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256, note_id) VALUES (?, ?, ?, ?, ?)",
+                             (path, stat.st_size, stat.st_mtime_ns, digest, cursor.lastrowid))
+                changed += 1
+
+        removed = [(path, record[3]) for path, record in known.items() if path not in seen and _under(path, folders)]
+        for path, note_id in removed:
+            conn.execute("DELETE FROM notes WHERE rowid = ?", (note_id,))
+            conn.execute("DELETE FROM files WHERE path = ?", (path,))
+    return changed, len(removed), unchanged
+
+
+def _quote_terms(query):
+    """Turn free text into an FTS5 query that matches all of its words."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def search(conn, query, limit=20):
+    """Best matches for an FTS5 query as (path, snippet) pairs.
+
+    Queries FTS5 can't parse (stray quotes, operators) are retried as plain words.
+    """
+    sql = (f"SELECT files.path, snippet(notes, 1, '[', ']', '...', 12) FROM notes "
+           f"JOIN files ON files.note_id = notes.rowid "
+           f"WHERE notes MATCH ? ORDER BY bm25(notes, {TITLE_WEIGHT}, 1.0) LIMIT ?")
+    try:
+        return conn.execute(sql, (query, limit)).fetchall()
+    except sqlite3.OperationalError:
+        return conn.execute(sql, (_quote_terms(query), limit)).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text index and search over the Markdown notes folders.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Index database file")
+    parser.add_argument("--folder", action="append",
+                        help="Folder to index, can be repeated (default: the notes output folders)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("update", help="Index new and changed notes")
+
+    search_parser = subparsers.add_parser("search", help="Search the index")
+    search_parser.add_argument("query", nargs="+", help="Words or an FTS5 query, e.g. 'invoice NOT draft'")
+    search_parser.add_argument("--limit", type=int, default=20, help="Maximum number of results")
+    search_parser.add_argument("--update", action="store_true", help="Update the index before searching")
+    args = parser.parse_args()
+
+    conn = open_index(args.db)
+    try:
+        if args.command == "update" or args.update:
+            folders = args.folder or DEFAULT_FOLDERS
+            start = time.perf_counter()
+            changed, removed, unchanged = update_index(conn, folders)
+            print(f"Indexed {changed} new or changed, removed {removed}, {unchanged} unchanged "
+                  f"in {time.perf_counter() - start:.2f}s")
+        if args.command == "search":
+            start = time.perf_counter()
+            results = search(conn, " ".join(args.query), args.limit)
+            elapsed = (time.perf_counter() - start) * 1000
+            for path, snippet in results:
+                print(f"{path}\n    {' '.join(snippet.split())}")
+            print(f"{len(results)} result(s) in {elapsed:.1f} ms")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
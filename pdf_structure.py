@@ -0,0 +1,174 @@
+import re
+
+import numpy as np
+
+# Lines whose font is at least this much larger than the page's body text
+# become headings: (size ratio, heading level), largest first
+HEADING_RATIOS = ((1.6, 1), (1.3, 2), (1.15, 3))
+
+# Headings longer than this are more likely large-print paragraphs
+MAX_HEADING_LENGTH = 120
+
+# Characters on baselines closer than this fraction of the font size share a line
+LINE_TOLERANCE = 0.5
+
+# A horizontal gap wider than this fraction of the font size is a word break
+WORD_GAP = 0.15
+
+# A vertical gap wider than this many line heights starts a new paragraph
+PARAGRAPH_GAP = 1.5
+
+# Bullet glyphs, including the "(cid:N)" placeholder pdfminer gives glyphs it can't map
+_BULLET = re.compile(r"^(?:[•●▪◦–‣⁃*-]|\(cid:\d+\))\s*")
+_NUMBERED = re.compile(r"^(\d{1,3})[.)]\s+")
+
+
+def _char_arrays(chars):
+    """Positions and font sizes of the page's characters as NumPy arrays."""
+    n = len(chars)
+    x0 = np.fromiter((c["x0"] for c in chars), dtype=np.float64, count=n)
+    x1 = np.fromiter((c["x1"] for c in chars), dtype=np.float64, count=n)
+    top = np.fromiter((c["top"] for c in chars), dtype=np.float64, count=n)
+    bottom = np.fromiter((c["bottom"] for c in chars), dtype=np.float64, count=n)
+    size = np.fromiter((c["size"] for c in chars), dtype=np.float64, count=n)
+    text = np.array([c["text"] for c in chars], dtype=object)
+    return x0, x1, top, bottom, size, text
+
+
+def _outside(x0, top, x1, bottom, bboxes):
+    """Mask of characters that lie outside every bounding box."""
+    keep = np.ones(len(x0), dtype=bool)
+    for bx0, btop, bx1, bbottom in bboxes:
+        keep &= ~((x0 >= bx0) & (x1 <= bx1) & (top >= btop) & (bottom <= bbottom))
+    return keep
+
+
+def _lines(x0, x1, top, bottom, size, text):
+    """Group characters into text lines.
+
+    Returns a list of (top, bottom, font size, text) in reading order. Lines
+    are found by sorting on the baseline and splitting where it jumps, then
+    each line is ordered left to right and spaces are put into gaps wider
+    than WORD_GAP of the font size, all on whole arrays at once.
+    """
+    order = np.argsort(top, kind="stable")
+    jumps = np.diff(top[order]) > LINE_TOLERANCE * size[order][1:]
+    line_of = np.empty(len(order), dtype=np.int64)
+    line_of[order] = np.concatenate(([0], np.cumsum(jumps)))
+
+    order = np.lexsort((x0, line_of))
+    x0, x1, top, bottom, size, text, line_of = (a[order] for a in (x0, x1, top, bottom, size, text, line_of))
+    starts = np.flatnonzero(np.concatenate(([True], line_of[1:] != line_of[:-1])))
+
+    gap = np.concatenate(([0.0], x0[1:] - x1[:-1]))
+    space = gap > WORD_GAP * size
+    space[starts] = False
+    # Don't double up on spaces the PDF already has
+    blank = np.array([t.isspace() for t in text], dtype=bool)
+    space &= ~blank & ~np.concatenate(([False], blank[:-1]))
+    pieces = np.where(space, " " + text, text)
+
+    line_top = np.minimum.reduceat(top, starts)
+    line_bottom = np.maximum.reduceat(bottom, starts)
+    line_size = np.maximum.reduceat(size, starts)
+    ends = np.append(starts[1:], len(text))
+    return [(line_top[i], line_bottom[i], line_size[i], "".join(pieces[s:e]).strip())
+            for i, (s, e) in enumerate(zip(starts, ends))]
+
+
+def body_size(size):
+    """Most common font size on the page, weighted by character count."""
+    sizes, counts = np.unique(np.round(size, 1), return_counts=True)
+    return sizes[np.argmax(counts)]
+
+
+def heading_level(line_size, body):
+    for ratio, level in HEADING_RATIOS:
+        if line_size >= body * ratio:
+            return level
+    return 0
+
+
+def _cell(value):
+    return (value or "").replace("\n", " ").replace("|", "\\|").strip()
+
+
+def table_markdown(rows):
+    """Pipe table for rows of cells as returned by pdfplumber's Table.extract()."""
+    rows = [row for row in rows if any(cell for cell in row)]
+    if not rows:
+        return ""
+    width = max(len(row) for row in rows)
+    rows = [[_cell(cell) for cell in row] + [""] * (width - len(row)) for row in rows]
+    lines = ["| " + " | ".join(rows[0]) + " |", "|" + " --- |" * width]
+    lines.extend("| " + " | ".join(row) + " |" for row in rows[1:])
+    return "\n".join(lines)
+
+
+def _list_item(text):
+    numbered = _NUMBERED.match(text)
+    if numbered:
+        return f"{numbered.group(1)}. {text[numbered.end():]}"
+    bullet = _BULLET.match(text)
+    if bullet and bullet.end() < len(text):
+        return "- " + text[bullet.end():]
+    return None
+
+
+def _paragraph_block(lines):
+    return lines[0][0], "\n".join(line for _, line in lines)
+
+
+def page_markdown(page):
+    """Markdown for one pdfplumber page: headings, paragraphs, lists and pipe tables."""
+    tables = []
+    # Only pages with ruling lines or boxes can hold tables the line strategy finds
+    if page.lines or page.rects:
+        tables = [(table.bbox, table.extract()) for table in page.find_tables()]
+
+    chars = page.chars
+    blocks = [(bbox[1], table_markdown(rows)) for bbox, rows in tables]
+    if chars:
+        x0, x1, top, bottom, size, text = _char_arrays(chars)
+        keep = _outside(x0, top, x1, bottom, [bbox for bbox, _ in tables])
+        if keep.any():
+            x0, x1, top, bottom, size, text = (a[keep] for a in (x0, x1, top, bottom, size, text))
+            body = body_size(size)
+            paragraph = []
+            previous_bottom = None
+            for line_top, line_bottom, line_size, line in _lines(x0, x1, top, bottom, size, text):
+                if not line:
+                    continue
+                level = heading_level(line_size, body) if len(line) <= MAX_HEADING_LENGTH else 0
+                item = _list_item(line)
+                new_block = (level or item is not None or previous_bottom is None
+                             or line_top - previous_bottom > PARAGRAPH_GAP * (line_bottom - line_top))
+                if new_block and paragraph:
+                    blocks.append(_paragraph_block(paragraph))
+                    paragraph = []
+                if level:
+                    blocks.append((line_top, "#" * level + " " + line))
+                    previous_bottom = None
+                    continue
+                paragraph.append((line_top, item if item is not None else line))
+                if item is not None:
+                    # Each list item is its own block so items stay one per line
+                    blocks.append(_paragraph_block(paragraph))
+                    paragraph = []
+                previous_bottom = line_bottom
+            if paragraph:
+                blocks.append(_paragraph_block(paragraph))
+
+    blocks.sort(key=lambda block: block[0])
+    return _join_blocks([markdown for _, markdown in blocks if markdown])
+
+
+def _join_blocks(blocks):
+    """Join blocks with blank lines, except between consecutive list items."""
+    parts = []
+    for markdown in blocks:
+        if parts:
+            previous_item = _list_item(parts[-1].rsplit("\n", 1)[-1]) is not None
+            parts.append("\n" if previous_item and _list_item(markdown) is not None else "\n\n")
+        parts.append(markdown)
+    return "".join(parts)
@@ -1,48 +1,342 @@
+import argparse
+import filecmp
+import hashlib
 import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
 import pdfplumber
+from pdfminer.high_level import extract_pages as pdfminer_pages
+from pdfminer.layout import LTCurve, LTTextContainer
+
+try:
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+except ImportError:
+    pdfium = None
+
+from file_io import load_json, save_json
+
+# PDFs with more pages than this are split into page ranges converted in parallel
+LARGE_PDF_PAGES = 100
+
+# Pages handled by one task when a large PDF is split
+PAGES_PER_CHUNK = 50
+
+# Conversion cache kept in the output folder
+CACHE_NAME = ".pdf_to_md_cache.json"
+
+# Bump when the conversion output changes so cached results are redone
+CONVERTER_VERSION = 1
+
+# Text extractors: "pdfium" and "pdfminer" are fast paths that hand pages with
+# ruling lines or boxes (likely tables) to pdfplumber; "auto" is pdfium when
+# pypdfium2 is installed, otherwise pdfminer
+BACKENDS = ("auto", "pdfium", "pdfminer", "pdfplumber")
+
+def resolve_backend(backend):
+    if backend == "auto":
+        return "pdfium" if pdfium else "pdfminer"
+    if backend == "pdfium" and not pdfium:
+        raise ImportError("The pdfium backend needs pypdfium2 (pip install pypdfium2)")
+    return backend
+
+def _pdfium_texts(pdf_path, start, end):
+    """Yield (page index, text) for pages [start, end), or None as text when pdfplumber should handle the page."""
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        for index in range(start, len(pdf) if end is None else end):
+            page = pdf[index]
+            try:
+                if next(page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_PATH,), max_depth=1), None):
+                    yield index, None
+                    continue
+                textpage = page.get_textpage()
+                text = textpage.get_text_range().replace('\r\n', '\n')
+                textpage.close()
+                yield index, text
+            finally:
+                page.close()
+    finally:
+        pdf.close()
+
+def _pdfminer_texts(pdf_path, start, end):
+    """Yield (page index, text) like _pdfium_texts, using pdfminer's layout analysis."""
+    page_numbers = range(start, 2 ** 31 if end is None else end)
+    for index, layout in enumerate(pdfminer_pages(pdf_path, page_numbers=page_numbers), start):
+        if any(isinstance(element, LTCurve) for element in layout):
+            yield index, None
+            continue
+        yield index, ''.join(element.get_text() for element in layout
+                             if isinstance(element, LTTextContainer)).strip()
+
+def _pdfplumber_texts(pdf_path, start, end):
+    with pdfplumber.open(pdf_path) as pdf:
+        for index in range(start, len(pdf.pages) if end is None else end):
+            yield index, None
+
+FAST_BACKENDS = {"pdfium": _pdfium_texts, "pdfminer": _pdfminer_texts, "pdfplumber": _pdfplumber_texts}
+
+def convert_pages(pdf_path, out_path, start=0, end=None, backend="auto", structured=False):
+    """Write the text of pages [start, end) of a PDF to out_path, page by page.
+
+    Each page is written as soon as it is extracted and its parsed objects
+    are released straight after, so memory stays flat however long the PDF
+    is. Pages the fast backend passes on are extracted with pdfplumber,
+    which is only opened if needed. Returns (pages written, pages that
+    went to pdfplumber).
+
+    structured writes Markdown headings, lists and pipe tables rebuilt from
+    pdfplumber's layout data (see pdf_structure) instead of plain text; it
+    needs pdfplumber for every page, so backend is ignored.
+    """
+    if structured:
+        # Only needed for this mode, which pulls in NumPy
+        from pdf_structure import page_markdown
+        pages = _pdfplumber_texts
+    else:
+        pages = FAST_BACKENDS[resolve_backend(backend)]
+    count = 0
+    fallbacks = 0
+    plumber = None
+    try:
+        with open(out_path, 'w', encoding='utf-8') as out:
+            for index, text in pages(pdf_path, start, end):
+                if text is None:
+                    if plumber is None:
+                        plumber = pdfplumber.open(pdf_path)
+                    page = plumber.pages[index]
+                    text = page_markdown(page) if structured else page.extract_text()
+                    # Drop the page's cached layout objects
+                    page.close()
+                    fallbacks += 1
+                out.write(text or '')  # Add empty string if no text extracted
+                out.write('\n\n')  # Add spacing between pages
+                count += 1
+    finally:
+        if plumber is not None:
+            plumber.close()
+    return count, fallbacks
+
+def count_pages(pdf_path):
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+def part_path(output_folder, pdf_file, index):
+    """Temporary file holding one converted page range of a PDF."""
+    return os.path.join(output_folder, f"{os.path.splitext(pdf_file)[0]}.md.part{index}")
+
+def plan_tasks(input_folder, pdf_files):
+    """Split the PDFs into (pdf_file, chunk_index, start, end) tasks.
+
+    Returns the tasks and the number of chunks per file. A PDF whose page
+    count can't be read becomes one whole-file task, so its error is
+    reported by the worker like any other.
+    """
+    tasks = []
+    chunks = {}
+    for pdf_file in pdf_files:
+        pdf_path = os.path.join(input_folder, pdf_file)
+        try:
+            pages = count_pages(pdf_path)
+        except Exception:
+            pages = 0
+        if pages > LARGE_PDF_PAGES:
+            ranges = [(start, min(start + PAGES_PER_CHUNK, pages)) for start in range(0, pages, PAGES_PER_CHUNK)]
+        else:
+            ranges = [(0, None)]
+        chunks[pdf_file] = len(ranges)
+        for index, (start, end) in enumerate(ranges):
+            tasks.append((pdf_file, index, start, end))
+    return tasks, chunks
 
-def pdf_to_markdown(input_folder, output_folder):
+def _run_tasks(input_folder, output_folder, tasks, workers, backend="auto", structured=False):
+    """Run conversion tasks in a process pool, each writing its own part file.
+
+    Returns {task: (pages, fallback pages) or Exception} plus the tasks lost because a
+    worker process died (segfault, out of memory), which are retried separately.
+    """
+    results = {}
+    broken = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(convert_pages, os.path.join(input_folder, task[0]),
+                                   part_path(output_folder, task[0], task[1]), task[2], task[3], backend, structured): task
+                   for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                results[task] = future.result()
+            except BrokenProcessPool:
+                broken.append(task)
+            except Exception as e:
+                results[task] = e
+    return results, broken
+
+def file_hash(path):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def converter_settings(backend="auto", structured=False):
+    """Everything besides the PDF itself that affects the Markdown output."""
+    if structured:
+        return {"version": CONVERTER_VERSION, "backend": "pdfplumber", "structured": True}
+    return {"version": CONVERTER_VERSION, "backend": resolve_backend(backend)}
+
+def is_cached(entry, pdf_path, md_path, settings):
+    """True if pdf_path was already converted to md_path with these settings.
+
+    Size and mtime are enough when they match; otherwise the content hash
+    decides, so a PDF that was only touched or copied is not re-converted.
+    The entry is updated in place when only the mtime had changed.
+    """
+    if not entry or entry.get("settings") != settings or not os.path.exists(md_path):
+        return False
+    stat = os.stat(pdf_path)
+    if entry.get("size") != stat.st_size:
+        return False
+    if entry.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    if entry.get("sha256") != file_hash(pdf_path):
+        return False
+    entry["mtime_ns"] = stat.st_mtime_ns
+    return True
+
+def cache_entry(pdf_path, settings):
+    stat = os.stat(pdf_path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_hash(pdf_path),
+        "settings": settings,
+    }
+
+def _remove_parts(part_paths):
+    for path in part_paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+def finish_markdown(md_path, part_paths):
+    """Join the part files into md_path in order, streaming rather than loading them.
+
+    md_path is left untouched if its content would not change. Returns True
+    if the file was written.
+    """
+    if len(part_paths) == 1:
+        new_path = part_paths[0]
+    else:
+        new_path = md_path + ".tmp"
+        with open(new_path, 'wb') as md_file:
+            for path in part_paths:
+                with open(path, 'rb') as part:
+                    shutil.copyfileobj(part, md_file)
+        _remove_parts(part_paths)
+
+    if os.path.exists(md_path) and filecmp.cmp(new_path, md_path, shallow=False):
+        os.remove(new_path)
+        return False
+    os.replace(new_path, md_path)
+    return True
+
+def pdf_to_markdown(input_folder, output_folder, workers=None, force=False, backend="auto", structured=False):
+    """Convert every PDF in input_folder to a Markdown file in output_folder.
+
+    PDFs, and page ranges of very large PDFs, are spread over a process pool
+    of `workers` processes (default: one per core); pages are merged back in
+    order. A PDF that fails, or even crashes its worker, only affects itself.
+
+    PDFs converted before with the same settings (see converter_settings) are
+    skipped unless force is set; the record lives in output_folder.
+
+    backend picks the text extractor (see BACKENDS); structured writes
+    headings and tables as Markdown instead of plain text.
+    """
     # Create output folder if it doesn't exist
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
-    
+
     # Get all PDF files in the input folder
     pdf_files = [f for f in os.listdir(input_folder) if f.lower().endswith('.pdf')]
-    
+    if not pdf_files:
+        print(f"No PDF files found in {input_folder}")
+        return
+
+    cache_path = os.path.join(output_folder, CACHE_NAME)
+    cache = load_json(cache_path)
+    settings = converter_settings(backend, structured)
+    if not force:
+        changed = []
+        for pdf_file in pdf_files:
+            md_path = os.path.join(output_folder, os.path.splitext(pdf_file)[0] + '.md')
+            if not is_cached(cache.get(pdf_file), os.path.join(input_folder, pdf_file), md_path, settings):
+                changed.append(pdf_file)
+        skipped = len(pdf_files) - len(changed)
+        if skipped:
+            print(f"Skipping {skipped} unchanged PDF(s)")
+        pdf_files = changed
+    if not pdf_files:
+        save_json(cache_path, cache, indent=1)
+        return
+
+    tasks, chunks = plan_tasks(input_folder, pdf_files)
+    results, broken = _run_tasks(input_folder, output_folder, tasks, workers or os.cpu_count(), backend, structured)
+    # Retry tasks from a crashed pool one at a time so only the culprit fails
+    for task in broken:
+        retried, still_broken = _run_tasks(input_folder, output_folder, [task], 1, backend, structured)
+        results.update(retried)
+        for task in still_broken:
+            results[task] = RuntimeError("PDF worker process crashed")
+
+    tasks_by_file = {pdf_file: [] for pdf_file in pdf_files}
+    for task in tasks:
+        tasks_by_file[task[0]].append(task)
+
     # Process each PDF file
     for pdf_file in pdf_files:
+        file_tasks = tasks_by_file[pdf_file]
+        part_paths = [part_path(output_folder, pdf_file, task[1]) for task in file_tasks]
+        errors = [results[task] for task in file_tasks if isinstance(results[task], Exception)]
+        if errors:
+            _remove_parts(part_paths)
+            print(f"Error converting {pdf_file}: {str(errors[0])}")
+            continue
         try:
-            # Construct full paths
-            pdf_path = os.path.join(input_folder, pdf_file)
             # Create markdown filename (replace .pdf with .md)
             md_filename = os.path.splitext(pdf_file)[0] + '.md'
-            md_path = os.path.join(output_folder, md_filename)
-            
-            # Open and extract text from PDF
-            with pdfplumber.open(pdf_path) as pdf:
-                text = ''
-                # Extract text from each page
-                for page in pdf.pages:
-                    text += page.extract_text() or ''  # Add empty string if no text extracted
-                    text += '\n\n'  # Add spacing between pages
-            
-            # Write text to markdown file
-            with open(md_path, 'w', encoding='utf-8') as md_file:
-                md_file.write(text)
-                
-            print(f"Converted: {pdf_file} -> {md_filename}")
-            
+            written = finish_markdown(os.path.join(output_folder, md_filename), part_paths)
+            cache[pdf_file] = cache_entry(os.path.join(input_folder, pdf_file), settings)
+            suffix = f" ({chunks[pdf_file]} chunks)" if chunks[pdf_file] > 1 else ""
+            if not written:
+                suffix += " (unchanged)"
+            print(f"Converted: {pdf_file} -> {md_filename}{suffix}")
         except Exception as e:
+            _remove_parts(part_paths)
             print(f"Error converting {pdf_file}: {str(e)}")
 
+    save_json(cache_path, cache, indent=1)
+
 def main():
+    parser = argparse.ArgumentParser(description="Convert a folder of PDFs to Markdown.")
     # Set your input and output folders
-    input_folder = r"C:\Users\felix\Scripts\PDF"  # Using raw string with r prefix
-    output_folder = r"C:\Users\felix\Scripts\MD"  # Different output folder suggested
-    
+    parser.add_argument("input_folder", nargs="?", default=r"C:\Users\felix\Scripts\PDF")  # Using raw string with r prefix
+    parser.add_argument("output_folder", nargs="?", default=r"C:\Users\felix\Scripts\MD")  # Different output folder suggested
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of converter processes (default: one per CPU core)")
+    parser.add_argument("--force", action="store_true",
+                        help="Convert every PDF even if it is unchanged since the last run")
+    parser.add_argument("--backend", choices=BACKENDS, default="auto",
+                        help="Text extractor; fast backends fall back to pdfplumber for pages with tables (default: auto)")
+    parser.add_argument("--structured", action="store_true",
+                        help="Write Markdown headings, lists and tables from the PDF layout instead of plain text")
+    args = parser.parse_args()
+
     print("Starting PDF to Markdown conversion...")
-    pdf_to_markdown(input_folder, output_folder)
+    pdf_to_markdown(args.input_folder, args.output_folder, args.workers, args.force, args.backend, args.structured)
     print("Conversion complete!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
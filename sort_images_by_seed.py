@@ -1,74 +1,190 @@
-import os
+import argparse
 import json
-from PIL import Image
+import os
+import re
 import shutil
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
 
 # Specify the directory containing your images
 input_folder = r"C:\Users\felix\ml\ComfyUI\output\Generator"
 
-# Function to extract the seed from an image's metadata
-def extract_metadata(image_path):
-    try:
-        with Image.open(image_path) as img:
-            # Check PNG info (not EXIF, since PNGs use text chunks)
-            if hasattr(img, 'info') and "prompt" in img.info:
-                prompt_data = img.info["prompt"]
-                # If prompt_data is already a dict, no need to parse
-                if isinstance(prompt_data, str):
-                    try:
-                        metadata = json.loads(prompt_data)
-                    except json.JSONDecodeError:
-                        print(f"Failed to parse prompt metadata in {image_path}")
-                        return None
-                elif isinstance(prompt_data, dict):
-                    metadata = prompt_data
-                else:
-                    print(f"Prompt metadata in {image_path} is not a string or dict")
-                    return None
-
-                # Look for the "Seed Everywhere" node in the metadata
-                for node_id, node in metadata.items():
-                    if isinstance(node, dict) and node.get("class_type") == "Seed Everywhere":
-                        seed = node["inputs"].get("seed")
-                        if seed:
-                            return str(seed)
-                print(f"No 'Seed Everywhere' node found in metadata for {image_path}")
-                return None
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_CHUNK_HEADER = struct.Struct(">I4s")
+
+SEED_NODE = "Seed Everywhere"
+
+# Images handed to a scanning thread at a time
+SCAN_BATCH_SIZE = 64
+
+# The node as ComfyUI serialises it: {"inputs": {"seed": 123}, "class_type": "Seed Everywhere", ...}
+_SEED_NODE_RE = re.compile(r'"inputs"\s*:\s*\{\s*"seed"\s*:\s*(\d+)\s*\}\s*,\s*"class_type"\s*:\s*"'
+                           + re.escape(SEED_NODE) + '"')
+
+
+def read_png_text(image_path, keys=("prompt",)):
+    """Text chunks (tEXt, zTXt, iTXt) of a PNG as {keyword: text}, without decoding any pixels.
+
+    Only chunks before the image data are read, like PIL's Image.open;
+    ComfyUI writes its metadata there. Stops as soon as every keyword in
+    keys is found. Returns None if the file isn't a PNG.
+    """
+    found = {}
+    with open(image_path, 'rb') as f:
+        if f.read(8) != PNG_SIGNATURE:
+            return None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            length, chunk_type = _CHUNK_HEADER.unpack(header)
+            if chunk_type in (b"IDAT", b"IEND"):
+                break
+            if chunk_type not in (b"tEXt", b"zTXt", b"iTXt"):
+                f.seek(length + 4, os.SEEK_CUR)
+                continue
+            data = f.read(length)
+            f.seek(4, os.SEEK_CUR)
+            if len(data) < length:
+                break
+            keyword, _, rest = data.partition(b"\0")
+            keyword = keyword.decode('latin-1')
+            if keyword not in keys:
+                continue
+            if chunk_type == b"tEXt":
+                found[keyword] = rest.decode('latin-1')
+            elif chunk_type == b"zTXt":
+                found[keyword] = zlib.decompress(rest[1:]).decode('latin-1')
             else:
-                print(f"No 'prompt' metadata found in {image_path}")
-                return None
+                compressed = rest[:1] == b"\1"
+                # Skip the compression method, language tag and translated keyword
+                text = rest[2:].split(b"\0", 2)[2]
+                found[keyword] = (zlib.decompress(text) if compressed else text).decode('utf-8')
+            if len(found) == len(keys):
+                break
+    return found
+
+
+def find_seed(prompt):
+    """The seed of the "Seed Everywhere" node in a ComfyUI prompt (JSON text or dict).
+
+    Raises ValueError saying why if there is none.
+    """
+    if isinstance(prompt, str):
+        position = prompt.find(SEED_NODE)
+        if position < 0:
+            raise ValueError(f"no '{SEED_NODE}' node in the metadata")
+        # Read the seed straight from the node's text; anything unusual gets the full parse below
+        match = _SEED_NODE_RE.match(prompt, max(prompt.rfind('"inputs"', 0, position), 0))
+        if match and int(match.group(1)):
+            return str(int(match.group(1)))
+        try:
+            prompt = json.loads(prompt)
+        except json.JSONDecodeError:
+            raise ValueError("failed to parse the prompt metadata")
+    elif not isinstance(prompt, dict):
+        raise ValueError("prompt metadata is not a string or dict")
+
+    # Look for the "Seed Everywhere" node in the metadata
+    for node_id, node in prompt.items():
+        if isinstance(node, dict) and node.get("class_type") == SEED_NODE:
+            seed = node.get("inputs", {}).get("seed")
+            if seed:
+                return str(seed)
+    raise ValueError(f"no '{SEED_NODE}' node in the metadata")
+
+
+def read_seed(image_path):
+    """(seed, None) for an image, or (None, why there is no seed)."""
+    try:
+        text = read_png_text(image_path)
+        if text is None:
+            # Not a PNG: let PIL find the metadata
+            with Image.open(image_path) as img:
+                text = img.info
+        if "prompt" not in text:
+            return None, "no 'prompt' metadata"
+        return find_seed(text["prompt"]), None
     except Exception as e:
-        print(f"Error processing {image_path}: {e}")
-        return None
+        return None, str(e)
+
+
+def list_images(folder):
+    with os.scandir(folder) as entries:
+        return sorted(entry.path for entry in entries
+                      if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def _read_batch(image_paths):
+    return [read_seed(image_path) for image_path in image_paths]
+
+
+def scan_seeds(image_paths, workers=None, batch_size=SCAN_BATCH_SIZE):
+    """Every image's read_seed() result as {path: (seed, problem)}, reading the files on a thread pool.
+
+    Threads mostly wait on the disk (or antivirus) opening each file, so
+    they overlap that latency; images go to them in batches to keep the
+    pool's own overhead small next to the few microseconds per image.
+    """
+    batches = [image_paths[i:i + batch_size] for i in range(0, len(image_paths), batch_size)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = [result for batch in executor.map(_read_batch, batches) for result in batch]
+    return dict(zip(image_paths, results))
+
 
 # Function to sort images into folders based on seed
-def sort_images_by_seed():
+def sort_images_by_seed(folder=input_folder, workers=None, dry_run=False, verbose=False):
     # Ensure the input folder exists
-    if not os.path.exists(input_folder):
-        print(f"Input folder {input_folder} does not exist!")
+    if not os.path.exists(folder):
+        print(f"Input folder {folder} does not exist!")
         return
 
-    # Iterate through all files in the input folder
-    for filename in os.listdir(input_folder):
-        file_path = os.path.join(input_folder, filename)
-        
-        # Check if it's an image file
-        if os.path.isfile(file_path) and filename.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff')):
-            seed = extract_metadata(file_path)
-            if seed:
-                # Create a destination folder based on the seed value
-                seed_folder = os.path.join(input_folder, f"Seed_{seed}")
-                os.makedirs(seed_folder, exist_ok=True)
-                
-                # Move the image to the seed folder
-                destination_path = os.path.join(seed_folder, filename)
-                shutil.move(file_path, destination_path)
-                print(f"Moved {filename} to {seed_folder}")
-            else:
-                print(f"Skipping {filename} - no seed found")
+    start = time.perf_counter()
+    seeds = scan_seeds(list_images(folder), workers)
+    elapsed = time.perf_counter() - start
+    rate = f" ({len(seeds) / elapsed:.0f} images/s)" if elapsed else ""
+    print(f"Read the metadata of {len(seeds)} images in {elapsed:.2f}s{rate}")
+
+    moved = {}
+    for file_path, (seed, problem) in seeds.items():
+        filename = os.path.basename(file_path)
+        if not seed:
+            print(f"Skipping {filename} - {problem}")
+            continue
+        # Create a destination folder based on the seed value
+        seed_folder = os.path.join(folder, f"Seed_{seed}")
+        if not dry_run:
+            os.makedirs(seed_folder, exist_ok=True)
+            # Move the image to the seed folder
+            shutil.move(file_path, os.path.join(seed_folder, filename))
+        if verbose:
+            print(f"Moved {filename} to {seed_folder}")
+        moved[seed_folder] = moved.get(seed_folder, 0) + 1
+
+    for seed_folder, count in sorted(moved.items()):
+        print(f"{'Would move' if dry_run else 'Moved'} {count} image(s) to {seed_folder}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sort ComfyUI images into Seed_<seed> folders by their workflow seed.")
+    parser.add_argument("folder", nargs="?", default=input_folder, help="Folder of generated images")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Images read at once (default: Python's thread pool default)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report where the images would go")
+    parser.add_argument("--verbose", action="store_true", help="Print every moved image")
+    args = parser.parse_args()
+
+    print(f"Starting to sort images in {args.folder}")
+    sort_images_by_seed(args.folder, args.workers, args.dry_run, args.verbose)
+    print("Sorting complete!")
+
 
 # Run the script
 if __name__ == "__main__":
-    print(f"Starting to sort images in {input_folder}")
-    sort_images_by_seed()
-    print("Sorting complete!")
\ No newline at end of file
+    main()
@@ -0,0 +1,557 @@
+import hashlib
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+from file_io import ffmpeg_output, load_json, save_json
+
+# Whisper model used for voice notes and where its weights are kept
+WHISPER_MODEL = "base"
+MODEL_DIR = "C:\\WhisperModels"
+
+# Inference engines: openai-whisper (PyTorch) or faster-whisper (CTranslate2),
+# which runs quantised on the CPU with COMPUTE_TYPE
+BACKENDS = ("whisper", "faster-whisper")
+DEFAULT_BACKEND = "whisper"
+COMPUTE_TYPES = ("int8", "int8_float32", "float32")
+DEFAULT_COMPUTE_TYPE = "int8"
+
+# Default recording to transcribe and where the notes go
+DEFAULT_AUDIO_FILE = r"C:\Users\felix\Desktop\sops.wav"
+DEFAULT_VAULT_PATH = r"C:\Users\felix\Documents\Obisdian\Knowledge\SOPs"
+
+# Recordings picked up in batch and watch mode
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.ogg', '.flac', '.webm')
+
+# Per-folder record of the recordings already transcribed
+MANIFEST_NAME = "transcripts_manifest.json"
+
+# Transcripts by audio fingerprint and model settings, one JSON file each
+TRANSCRIPT_CACHE_DIR = os.path.join(MODEL_DIR, "transcripts")
+
+# Per-vault record of which note holds which recording's transcript
+NOTE_INDEX_NAME = ".voice_notes_index.json"
+
+# CPU threads each loaded model uses; the worker pool gets cores // this many models
+THREADS_PER_MODEL = 4
+
+# Whisper works on 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+# Streaming mode: chunks are cut at a pause once they are at least
+# MIN_CHUNK_SECONDS long and forced at MAX_CHUNK_SECONDS (Whisper's window)
+MIN_CHUNK_SECONDS = 10.0
+MAX_CHUNK_SECONDS = 30.0
+
+# Energy voice-activity detection: 30 ms frames, a pause is MIN_SILENCE_SECONDS
+# of frames quieter than max(SILENCE_FLOOR, SILENCE_FACTOR x the noise floor).
+# The noise floor is the NOISE_PERCENTILE of the last NOISE_HISTORY_SECONDS of
+# frames, but never above NOISE_SPEECH_FRACTION of their SPEECH_PERCENTILE, so
+# stretches of speech with few pauses can't raise it to speech level.
+# SILENCE_FLOOR (-80 dBFS) only keeps digital silence from counting as sound;
+# quiet recordings are judged against their own noise floor
+VAD_FRAME_SECONDS = 0.03
+MIN_SILENCE_SECONDS = 0.3
+SILENCE_FLOOR = 0.0001
+SILENCE_FACTOR = 3.0
+NOISE_HISTORY_SECONDS = 60.0
+NOISE_PERCENTILE = 10
+SPEECH_PERCENTILE = 90
+NOISE_SPEECH_FRACTION = 0.1
+
+# Audio read from ffmpeg at a time in streaming mode
+READ_SECONDS = 1.0
+
+# Where whisper_server.py listens
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_URL = f"http://{SERVER_HOST}:{SERVER_PORT}"
+
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None
+
+
+class FasterWhisperModel:
+    """A faster-whisper model behind openai-whisper's transcribe() interface."""
+
+    def __init__(self, name, download_root=MODEL_DIR, compute_type=DEFAULT_COMPUTE_TYPE, threads=0):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(name, device="cpu", compute_type=compute_type, cpu_threads=threads,
+                                  download_root=download_root)
+
+    def transcribe(self, audio, initial_prompt=None):
+        # Greedy decoding, the same as openai-whisper's transcribe() default
+        segments, info = self.model.transcribe(audio, beam_size=1, initial_prompt=initial_prompt)
+        return {"text": "".join(segment.text for segment in segments), "language": info.language}
+
+
+def load_model(name=WHISPER_MODEL, download_root=MODEL_DIR, backend=DEFAULT_BACKEND,
+               compute_type=DEFAULT_COMPUTE_TYPE, threads=0):
+    """Load a Whisper model; this is the slow step the server does only once.
+
+    threads is the number of CPU threads inference may use (0: the
+    engine's default). compute_type only applies to faster-whisper.
+    """
+    if backend == "faster-whisper":
+        return FasterWhisperModel(name, download_root, compute_type, threads)
+    if backend != "whisper":
+        raise ValueError(f"Unknown backend '{backend}'")
+    # Imported here so the client side of the server doesn't need Whisper installed
+    import whisper
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    return whisper.load_model(name, download_root=download_root)
+
+
+def model_settings(name=WHISPER_MODEL, backend=DEFAULT_BACKEND, compute_type=DEFAULT_COMPUTE_TYPE):
+    """What identifies a model's output, for the transcripts manifest.
+
+    The backend is only included when it isn't the default, so manifests
+    written before backends existed stay valid.
+    """
+    settings = {"model": name}
+    if backend != DEFAULT_BACKEND:
+        settings["backend"] = backend
+        settings["compute_type"] = compute_type
+    return settings
+
+
+def default_workers(threads_per_model=THREADS_PER_MODEL):
+    return max(1, (os.cpu_count() or 1) // threads_per_model)
+
+
+def load_model_pool(workers, name=WHISPER_MODEL, download_root=MODEL_DIR, backend=DEFAULT_BACKEND,
+                    compute_type=DEFAULT_COMPUTE_TYPE):
+    """Load one model per worker and return them in a queue for transcribe_pooled.
+
+    Each worker needs its own copy: Whisper installs its decoding cache
+    hooks on the model during transcribe, so two threads can't share one.
+    The cores are split evenly between the copies.
+    """
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    pool = queue.Queue()
+    for _ in range(workers):
+        pool.put(load_model(name, download_root, backend, compute_type, threads))
+    return pool
+
+
+@contextmanager
+def _borrow(model):
+    """Use a model directly, whichever one in a pool is free, or one from a loader function.
+
+    Pools wait for a model to come free; a loader is only called here, so
+    answers from the transcript cache never pay for loading the model.
+    """
+    if isinstance(model, queue.Queue):
+        pool, model = model, model.get()
+        try:
+            yield model
+        finally:
+            pool.put(model)
+    elif hasattr(model, "transcribe"):
+        yield model
+    else:
+        yield model()
+
+
+def _pcm_command(audio_file):
+    """ffmpeg command decoding any audio file to 16 kHz mono 16-bit PCM on stdout."""
+    return ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-i", audio_file,
+            "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"]
+
+
+def decode_pcm(audio_file):
+    """Decode a recording to 16 kHz mono 16-bit PCM bytes through an ffmpeg pipe.
+
+    Nothing is written to disk and no WAV file has to be re-read and checked.
+    """
+    if not os.path.exists(audio_file):
+        raise FileNotFoundError(f"Audio file not found: {audio_file}")
+    result = subprocess.run(_pcm_command(audio_file), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        stderr = result.stderr.decode(errors="replace").splitlines()
+        raise RuntimeError(f"FFmpeg error for {audio_file} (exit code {result.returncode}):\n" + "\n".join(stderr[-20:]))
+    return result.stdout
+
+
+def pcm_to_audio(pcm):
+    """The float32 array Whisper takes from 16-bit PCM bytes."""
+    import numpy as np
+    audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    audio /= 32768.0
+    return audio
+
+
+def load_audio(audio_file):
+    """Decode a recording into the float32 16 kHz mono array Whisper takes."""
+    return pcm_to_audio(decode_pcm(audio_file))
+
+
+def hash_audio(audio_file):
+    """SHA-256 of a recording's decoded PCM, read through the pipe without holding it all."""
+    digest = hashlib.sha256()
+    process = subprocess.Popen(_pcm_command(audio_file), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        for block in iter(lambda: process.stdout.read(1024 * 1024), b''):
+            digest.update(block)
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise RuntimeError(f"FFmpeg could not decode {audio_file} (exit code {returncode})")
+    return digest.hexdigest()
+
+
+def transcript_key(pcm_digest, settings):
+    """Cache key for a recording: its decoded audio plus the model settings.
+
+    Built from the decoded PCM rather than the file, so a copy, a rename
+    or a re-encode to another container of the same audio still hits.
+    """
+    return hashlib.sha256((pcm_digest + json.dumps(settings, sort_keys=True)).encode()).hexdigest()
+
+
+def load_cached(key, cache_dir=TRANSCRIPT_CACHE_DIR):
+    return load_json(os.path.join(cache_dir, key + ".json"))
+
+
+def store_cached(key, entry, cache_dir=TRANSCRIPT_CACHE_DIR):
+    save_json(os.path.join(cache_dir, key + ".json"), entry)
+
+
+_key_locks = {}  # key -> [lock, number of threads using it]
+_key_locks_guard = threading.Lock()
+
+
+@contextmanager
+def key_lock(key):
+    """Hold a lock for key (any hashable) in this process; a false key locks nothing.
+
+    Keeps two threads from transcribing the same audio, or writing the
+    same note, at once: the second waits and then finds the first's work.
+    """
+    if not key:
+        yield
+        return
+    with _key_locks_guard:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _key_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _key_locks[key]
+
+
+def transcribe_file(model, audio_file, settings=None, cache_dir=TRANSCRIPT_CACHE_DIR):
+    """Transcribe one recording and return {"text", "key", "cached"}.
+
+    model is a loaded model, a pool from load_model_pool or a function
+    that loads one. When settings (see model_settings) are given, the
+    transcript is cached under transcript_key and a recording whose audio
+    was transcribed before with the same settings is answered from the
+    cache without touching a model; otherwise key is None. The same audio
+    being transcribed on another thread is waited for, not repeated.
+    """
+    pcm = decode_pcm(audio_file)
+    key = None
+    if settings is not None:
+        key = transcript_key(hashlib.sha256(pcm).hexdigest(), settings)
+
+    with key_lock(key):
+        if key:
+            entry = load_cached(key, cache_dir)
+            if "text" in entry:
+                return {"text": entry["text"], "key": key, "cached": True}
+        with _borrow(model) as loaded:
+            text = loaded.transcribe(pcm_to_audio(pcm))["text"]
+        if key:
+            store_cached(key, dict(load_cached(key, cache_dir), text=text, settings=settings), cache_dir)
+    return {"text": text, "key": key, "cached": False}
+
+
+def _frame_energy(audio, frame):
+    """RMS level of every whole VAD frame in audio."""
+    import numpy as np
+    frames = audio[:len(audio) // frame * frame].reshape(-1, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def silence_threshold(energy):
+    """Frame energy below which audio counts as a pause, from a history of frame energies."""
+    import numpy as np
+    noise, speech = np.percentile(energy, [NOISE_PERCENTILE, SPEECH_PERCENTILE])
+    return max(SILENCE_FLOOR, SILENCE_FACTOR * min(noise, NOISE_SPEECH_FRACTION * speech))
+
+
+def find_cut(audio, final=False, history=None):
+    """Where to end the next chunk of audio (in samples), or None to wait for more.
+
+    Cuts in the middle of the last finished pause centred after
+    MIN_CHUNK_SECONDS; a chunk that reaches MAX_CHUNK_SECONDS without one
+    is cut at its quietest frame. history holds the frame energies of the
+    audio before this chunk, for a steadier noise floor.
+    """
+    import numpy as np
+    if final and len(audio) <= MAX_CHUNK_SECONDS * SAMPLE_RATE:
+        return len(audio)
+    if len(audio) < MIN_CHUNK_SECONDS * SAMPLE_RATE:
+        return None
+
+    frame = int(VAD_FRAME_SECONDS * SAMPLE_RATE)
+    energy = _frame_energy(audio[:int(MAX_CHUNK_SECONDS * SAMPLE_RATE)], frame)
+    threshold = silence_threshold(energy if history is None else np.concatenate((history, energy)))
+    silent = energy < threshold
+    first = int(MIN_CHUNK_SECONDS / VAD_FRAME_SECONDS)
+
+    # Runs of silent frames: starts where silence begins, ends where it stops
+    edges = np.diff(np.concatenate(([0], silent.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+    # A pause is finished once speech resumes after it; a "pause" taking up most
+    # of the chunk means the threshold is off rather than that someone paused
+    pauses = ((lengths >= MIN_SILENCE_SECONDS / VAD_FRAME_SECONDS) & (lengths < len(energy) // 2)
+              & ((starts + ends) // 2 >= first) & (ends < len(energy)))
+    if pauses.any():
+        run = np.flatnonzero(pauses)[-1]
+        return int((starts[run] + ends[run]) // 2 * frame)
+    if len(audio) >= MAX_CHUNK_SECONDS * SAMPLE_RATE:
+        return int((first + np.argmin(energy[first:])) * frame)
+    return None
+
+
+def has_speech(audio, history=None):
+    """False for chunks whose every frame is a pause, judged like find_cut with history."""
+    import numpy as np
+    frame = int(VAD_FRAME_SECONDS * SAMPLE_RATE)
+    if len(audio) < frame:
+        return False
+    energy = _frame_energy(audio, frame)
+    threshold = silence_threshold(energy if history is None else np.concatenate((history, energy)))
+    return bool((energy >= threshold).any())
+
+
+def iter_speech_chunks(audio_file):
+    """Yield (start seconds, float32 samples) chunks of a recording, split at pauses.
+
+    The audio is decoded by ffmpeg to 16 kHz mono straight into a buffer
+    that never holds more than MAX_CHUNK_SECONDS plus one read, so memory
+    stays the same for a one-minute or a three-hour recording. Silent
+    chunks are skipped. Each chunk is a copy the caller may keep.
+    """
+    import numpy as np
+    if not os.path.exists(audio_file):
+        raise FileNotFoundError(f"Audio file not found: {audio_file}")
+
+    cmd = _pcm_command(audio_file)
+    read_samples = int(READ_SECONDS * SAMPLE_RATE)
+    pcm = np.empty(read_samples, dtype=np.int16)
+    view = memoryview(pcm).cast("B")
+    audio = np.empty(int(MAX_CHUNK_SECONDS * SAMPLE_RATE) + read_samples, dtype=np.float32)
+    filled = 0
+    offset = 0  # samples already handed out
+    frame = int(VAD_FRAME_SECONDS * SAMPLE_RATE)
+    history = np.empty(0, dtype=np.float32)  # frame energies of recent chunks
+
+    with ffmpeg_output(cmd, audio_file) as stdout:
+        done = False
+        while not done:
+            count = stdout.readinto(view)
+            if count:
+                samples = count // 2
+                audio[filled:filled + samples] = pcm[:samples]
+                audio[filled:filled + samples] /= 32768.0
+                filled += samples
+            else:
+                done = True
+            while filled:
+                cut = find_cut(audio[:filled], final=done, history=history)
+                if cut is None:
+                    break
+                chunk = audio[:cut]
+                speech = has_speech(chunk, history)
+                history = np.concatenate((history, _frame_energy(chunk, frame)))
+                history = history[-int(NOISE_HISTORY_SECONDS / VAD_FRAME_SECONDS):]
+                if speech:
+                    yield offset / SAMPLE_RATE, chunk.copy()
+                # Keep the rest of the buffer for the next chunk
+                audio[:filled - cut] = audio[cut:filled]
+                filled -= cut
+                offset += cut
+
+
+def transcribe_stream(model, audio_file):
+    """Yield (start seconds, text) for each chunk of a recording as soon as it is transcribed.
+
+    The end of the previous chunk's text is passed as the prompt for the
+    next, so sentences that run across a cut keep their context.
+    """
+    previous = ""
+    for start, chunk in iter_speech_chunks(audio_file):
+        text = model.transcribe(chunk, initial_prompt=previous[-200:] or None)["text"].strip()
+        if text:
+            previous = text
+            yield start, text
+
+
+def start_stream(model, audio_file, settings=None, cache_dir=TRANSCRIPT_CACHE_DIR):
+    """Streaming counterpart of transcribe_file: returns (key, cached, segments).
+
+    segments yields (start seconds, text) pairs, from the cache when the
+    audio was streamed before with the same settings. The cache key needs
+    the whole recording, so it is hashed in a quick decode-only pass
+    before transcription starts. A model from a pool is held until the
+    recording is done; cache hits never take one. If the same audio is
+    being streamed on another thread, segments waits for it and then
+    replays its cached transcript.
+    """
+    key = None
+    if settings is not None:
+        key = transcript_key(hash_audio(audio_file), settings)
+        segments = load_cached(key, cache_dir).get("segments")
+        if segments is not None:
+            return key, True, iter([tuple(segment) for segment in segments])
+    return key, False, _stream_and_cache(model, audio_file, key, settings, cache_dir)
+
+
+def _stream_and_cache(model, audio_file, key, settings, cache_dir):
+    # Locked only once iteration starts, so a stream closed unread never holds it
+    with key_lock(key):
+        cached = load_cached(key, cache_dir).get("segments") if key else None
+        if cached is not None:
+            for segment in cached:
+                yield tuple(segment)
+            return
+        segments = []
+        with _borrow(model) as loaded:
+            for segment in transcribe_stream(loaded, audio_file):
+                segments.append(segment)
+                yield segment
+        # Only a complete transcript is cached, and an empty one is more likely a failure
+        if key and segments:
+            store_cached(key, dict(load_cached(key, cache_dir), segments=segments, settings=settings), cache_dir)
+
+
+def open_note(vault_path, recorded=None):
+    """Create a new timestamped note in the vault and return (path, open file).
+
+    The timestamp is now, or the recorded time (seconds since the epoch)
+    when given. A number is appended rather than overwrite another note
+    with the same timestamp.
+    """
+    if not os.path.exists(vault_path):
+        raise FileNotFoundError(f"Vault path does not exist: {vault_path}")
+    timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(recorded))
+    base = os.path.join(vault_path, f"QuickVoiceNote-{timestamp}")
+    filename = base + ".md"
+    counter = 2
+    while True:
+        try:
+            return filename, open(filename, 'x', encoding='utf-8')
+        except FileExistsError:
+            filename = f"{base}-{counter}.md"
+            counter += 1
+
+
+def write_note(vault_path, transcript, recorded=None):
+    """Save a transcript as a timestamped note in the vault and return its path."""
+    filename, f = open_note(vault_path, recorded)
+    with f:
+        f.write(transcript)
+    return filename
+
+
+def write_streamed_note(vault_path, segments, recorded=None):
+    """Write (start, text) segments to a new note as they arrive and return its path.
+
+    Each segment is flushed straight away, so the note fills in while a
+    long recording is still being transcribed.
+    """
+    filename, f = open_note(vault_path, recorded)
+    with f:
+        for _, text in segments:
+            f.write(text + "\n\n")
+            f.flush()
+    return filename
+
+
+_note_index_lock = threading.Lock()
+
+
+def _note_has_text(note_path):
+    try:
+        with open(note_path, 'r', encoding='utf-8', errors='replace') as f:
+            return bool(f.read().strip())
+    except OSError:
+        return False
+
+
+def find_note(vault_path, key):
+    """The note already holding the transcript with this cache key, or None.
+
+    A note that has since been deleted or holds no text doesn't count.
+    """
+    if not key:
+        return None
+    with _note_index_lock:
+        note = load_json(os.path.join(vault_path, NOTE_INDEX_NAME)).get(key)
+    if note and _note_has_text(os.path.join(vault_path, note)):
+        return os.path.join(vault_path, note)
+    return None
+
+
+def remember_note(vault_path, key, note_path):
+    """Record which note holds the transcript with this cache key, so it isn't written twice.
+
+    Empty notes aren't recorded, so the next run writes the transcript again.
+    """
+    if not key or not _note_has_text(note_path):
+        return
+    index_path = os.path.join(vault_path, NOTE_INDEX_NAME)
+    with _note_index_lock:
+        index = load_json(index_path)
+        index[key] = os.path.basename(note_path)
+        save_json(index_path, index, indent=2)
+
+
+def list_recordings(folder, extensions=AUDIO_EXTENSIONS):
+    """Recordings in folder, oldest first."""
+    paths = [os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(extensions)]
+    return sorted((p for p in paths if os.path.isfile(p)), key=os.path.getmtime)
+
+
+_manifest_lock = threading.Lock()
+
+
+def is_transcribed(manifest, audio_file, settings):
+    """True if the manifest has this exact recording transcribed with these settings."""
+    entry = manifest.get(os.path.basename(audio_file))
+    if not entry or entry.get("settings") != settings:
+        return False
+    stat = os.stat(audio_file)
+    return entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns
+
+
+def record_transcript(manifest_path, audio_file, note_path, settings):
+    """Add a finished transcription to the manifest; safe to call from several threads."""
+    stat = os.stat(audio_file)
+    with _manifest_lock:
+        manifest = load_json(manifest_path)
+        manifest[os.path.basename(audio_file)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "settings": settings,
+            "note": note_path,
+        }
+        save_json(manifest_path, manifest, indent=2)
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from transcriber import (BACKENDS, COMPUTE_TYPES, DEFAULT_BACKEND, DEFAULT_COMPUTE_TYPE, MODEL_DIR, SERVER_HOST,
+                         SERVER_PORT, TRANSCRIPT_CACHE_DIR, WHISPER_MODEL, default_workers, ffmpeg_available,
+                         load_model_pool, model_settings, start_stream, transcribe_file)
+
+
+class TranscriptionHandler(BaseHTTPRequestHandler):
+    """JSON API: GET /health, POST /transcribe {"audio_file": path} -> {"text", "key", "cached"}.
+
+    With "stream": true in the request the reply is sent chunked as JSON
+    lines: {"key", "cached"} first, then one {"start": seconds, "text": ...}
+    per transcribed chunk, ending with {"error": ...} if transcription
+    fails part way. key identifies the audio and model settings (see
+    transcriber.transcript_key); cached replies come without inference.
+
+    The audio is read from disk by path, so the server only accepts
+    requests from this machine. Requests are handled concurrently, up to
+    one per loaded model; the rest wait for a model to come free.
+    """
+
+    # Needed for chunked replies
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+        self._reply(200, {"model": self.server.settings["model"], "settings": self.server.settings,
+                          "workers": self.server.workers})
+
+    def do_POST(self):
+        if self.path != "/transcribe":
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            audio_file = request["audio_file"]
+        except (ValueError, KeyError, TypeError):
+            self._reply(400, {"error": "Expected a JSON body with an audio_file path"})
+            return
+        if request.get("stream"):
+            self._stream(audio_file)
+            return
+
+        start = time.perf_counter()
+        try:
+            result = transcribe_file(self.server.pool, audio_file, self.server.cache_settings, self.server.cache_dir)
+        except FileNotFoundError as e:
+            self._reply(404, {"error": str(e)})
+            return
+        except Exception as e:
+            print(f"Transcription failed for {audio_file}: {e}")
+            self._reply(500, {"error": f"Transcription failed: {e}"})
+            return
+        seconds = time.perf_counter() - start
+        print(f"Transcribed {audio_file} in {seconds:.1f}s" + (" (cached)" if result["cached"] else ""))
+        self._reply(200, dict(result, seconds=round(seconds, 3)))
+
+    def _write_chunk(self, body):
+        data = json.dumps(body).encode('utf-8') + b"\n"
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream(self, audio_file):
+        if not os.path.exists(audio_file):
+            self._reply(404, {"error": f"Audio file not found: {audio_file}"})
+            return
+        start = time.perf_counter()
+        try:
+            key, cached, segments = start_stream(self.server.pool, audio_file, self.server.cache_settings,
+                                                 self.server.cache_dir)
+        except Exception as e:
+            print(f"Transcription failed for {audio_file}: {e}")
+            self._reply(500, {"error": f"Transcription failed: {e}"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            try:
+                self._write_chunk({"key": key, "cached": cached})
+                for chunk_start, text in segments:
+                    self._write_chunk({"start": round(chunk_start, 2), "text": text})
+            except (BrokenPipeError, ConnectionResetError):
+                raise
+            except Exception as e:
+                print(f"Transcription failed for {audio_file}: {e}")
+                self._write_chunk({"error": f"Transcription failed: {e}"})
+            else:
+                print(f"Streamed {audio_file} in {time.perf_counter() - start:.1f}s" + (" (cached)" if cached else ""))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Also how clients stop a stream they already have a note for
+            print(f"Client went away while streaming {audio_file}")
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        # Requests are logged by the handlers above
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a Whisper model loaded and transcribe voice notes on request.")
+    parser.add_argument("--model", default=WHISPER_MODEL, help="Whisper model name")
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="Inference engine (see benchmark_transcribe.py to compare them)")
+    parser.add_argument("--compute-type", choices=COMPUTE_TYPES, default=DEFAULT_COMPUTE_TYPE,
+                        help="Weight precision for faster-whisper")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Where the model weights are downloaded")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="Port to listen on (localhost only)")
+    parser.add_argument("--cache-dir", default=TRANSCRIPT_CACHE_DIR, help="Where transcripts are cached")
+    parser.add_argument("--no-cache", action="store_true", help="Always transcribe, never use or fill the cache")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Models kept loaded, i.e. recordings transcribed at once (default: one per 4 cores)")
+    args = parser.parse_args()
+
+    # Ensure FFmpeg is available
+    if not ffmpeg_available():
+        print("FFmpeg is not installed or not in PATH. Please install FFmpeg.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    try:
+        pool = load_model_pool(args.workers, args.model, args.model_dir, args.backend, args.compute_type)
+    except Exception as e:
+        print(f"Failed to load Whisper model: {e}")
+        print("Ensure the model is downloaded and the path is correct.")
+        sys.exit(1)
+    print(f"Loaded {args.workers} x Whisper model '{args.model}' ({args.backend}) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    server = ThreadingHTTPServer((SERVER_HOST, args.port), TranscriptionHandler)
+    server.pool = pool
+    server.workers = args.workers
+    server.settings = model_settings(args.model, args.backend, args.compute_type)
+    server.cache_settings = None if args.no_cache else server.settings
+    server.cache_dir = args.cache_dir
+    print(f"Listening on http://{SERVER_HOST}:{args.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,297 @@
-import whisper
-import wave
+import argparse
+import json
 import os
-import time
 import sys
-import tempfile
-
-# Ensure FFmpeg is available
-if not os.system("ffmpeg -version"):
-    print("FFmpeg is installed.")
-else:
-    print("FFmpeg is not installed or not in PATH. Please install FFmpeg.")
-    sys.exit(1)
-
-# Load Whisper model
-try:
-    model = whisper.load_model("base", download_root="C:\\WhisperModels")
-except Exception as e:
-    print(f"Failed to load Whisper model: {e}")
-    print("Ensure the model is downloaded and the path is correct.")
-    sys.exit(1)
-
-# Define the path to your pre-recorded WAV file (INPUT)
-audio_file = r"C:\Users\felix\Desktop\sops.wav"  # Replace this with your WAV file path
-
-# Check if the WAV file exists
-if not os.path.exists(audio_file):
-    print(f"Audio file not found: {audio_file}")
-    sys.exit(1)
-
-# Convert the WAV file to 16-bit PCM, mono, 16kHz using ffmpeg
-try:
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
-        temp_wav_path = temp_wav.name
-    ffmpeg_command = f"ffmpeg -y -i {audio_file} -ar 16000 -ac 1 -acodec pcm_s16le {temp_wav_path}"
-    if os.system(ffmpeg_command):
-        print("Failed to convert WAV file using ffmpeg.")
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from file_io import load_json
+from folder_watch import iter_new_files
+from transcriber import (AUDIO_EXTENSIONS, BACKENDS, COMPUTE_TYPES, DEFAULT_AUDIO_FILE, DEFAULT_BACKEND,
+                         DEFAULT_COMPUTE_TYPE, DEFAULT_VAULT_PATH, MANIFEST_NAME, MODEL_DIR, SERVER_URL,
+                         TRANSCRIPT_CACHE_DIR, WHISPER_MODEL, default_workers, ffmpeg_available, find_note, is_transcribed, key_lock,
+                         list_recordings, load_model, load_model_pool, model_settings,
+                         record_transcript, remember_note, start_stream, transcribe_file, write_note,
+                         write_streamed_note)
+
+
+def transcribe_with_server(server_url, audio_file):
+    """Have whisper_server.py transcribe audio_file.
+
+    Returns {"text", "key", "cached"} like transcriber.transcribe_file, or
+    None if no server is running.
+    """
+    body = json.dumps({"audio_file": os.path.abspath(audio_file)}).encode('utf-8')
+    request = urllib.request.Request(server_url + "/transcribe", data=body,
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.load(e)["error"]
+        except (ValueError, KeyError):
+            message = str(e)
+        raise RuntimeError(message)
+    except urllib.error.URLError:
+        return None
+
+
+def stream_with_server(server_url, audio_file):
+    """Have whisper_server.py stream the transcript of audio_file.
+
+    Returns (key, cached, segments) like transcriber.start_stream, where
+    segments yields each (start seconds, text) chunk as the server
+    finishes it, or None if no server is running.
+    """
+    body = json.dumps({"audio_file": os.path.abspath(audio_file), "stream": True}).encode('utf-8')
+    request = urllib.request.Request(server_url + "/transcribe", data=body,
+                                     headers={"Content-Type": "application/json"})
+    try:
+        response = urllib.request.urlopen(request)
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.load(e)["error"]
+        except (ValueError, KeyError):
+            message = str(e)
+        raise RuntimeError(message)
+    except urllib.error.URLError:
+        return None
+    header = json.loads(response.readline())
+    return header.get("key"), header.get("cached", False), _read_stream(response)
+
+
+def _read_stream(response):
+    with response:
+        for line in response:
+            segment = json.loads(line)
+            if "error" in segment:
+                raise RuntimeError(segment["error"])
+            yield segment["start"], segment["text"]
+
+
+def server_info(server_url):
+    """The running server's model and worker count, or None if there is no server."""
+    try:
+        with urllib.request.urlopen(server_url + "/health") as response:
+            return json.load(response)
+    except (urllib.error.URLError, ValueError):
+        return None
+
+
+def _check_ffmpeg():
+    # Ensure FFmpeg is available
+    if not ffmpeg_available():
+        print("FFmpeg is not installed or not in PATH. Please install FFmpeg.")
         sys.exit(1)
-    audio_file = temp_wav_path
-    print("WAV file successfully converted to 16-bit PCM, mono, 16kHz.")
-except Exception as e:
-    print(f"Failed to convert WAV file: {e}")
-    sys.exit(1)
-
-# Verify WAV file format (should be 16-bit, 16kHz, mono)
-try:
-    with wave.open(audio_file, 'rb') as wf:
-        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != 16000:
-            print("Audio file must be WAV format, mono, 16-bit PCM, 16kHz sample rate.")
-            print("Use FFmpeg to convert: ffmpeg -i input.wav -ar 16000 -ac 1 output.wav")
+
+
+def local_settings(model_options=None):
+    options = model_options or {}
+    return model_settings(options.get("name", WHISPER_MODEL), options.get("backend", DEFAULT_BACKEND),
+                          options.get("compute_type", DEFAULT_COMPUTE_TYPE))
+
+
+def _load_or_exit(load, *args, **kwargs):
+    try:
+        return load(*args, **kwargs)
+    except Exception as e:
+        print(f"Failed to load Whisper model: {e}")
+        print("Ensure the model is downloaded and the path is correct.")
+        sys.exit(1)
+
+
+def transcribe_locally(audio_file, stream=False, model_options=None, cache=True, cache_dir=TRANSCRIPT_CACHE_DIR):
+    """Transcribe in this process, as before the server existed.
+
+    The model is only loaded if the transcript isn't cached already.
+    """
+    _check_ffmpeg()
+    model = lambda: _load_or_exit(load_model, **(model_options or {}))
+    settings = local_settings(model_options) if cache else None
+    if stream:
+        return start_stream(model, audio_file, settings, cache_dir)
+    return transcribe_file(model, audio_file, settings, cache_dir)
+
+
+def local_transcriber(workers, stream=False, model_options=None, cache=True, cache_dir=TRANSCRIPT_CACHE_DIR):
+    """A transcribe(audio_file) function backed by models loaded in this process."""
+    _check_ffmpeg()
+    pool = _load_or_exit(load_model_pool, workers, **(model_options or {}))
+    settings = local_settings(model_options) if cache else None
+    if stream:
+        return lambda audio_file: start_stream(pool, audio_file, settings, cache_dir)
+    return lambda audio_file: transcribe_file(pool, audio_file, settings, cache_dir)
+
+
+def _echo(segments):
+    """Print streamed segments as they arrive while passing them on."""
+    for start, text in segments:
+        print(f"[{int(start) // 60:02d}:{int(start) % 60:02d}] {text}")
+        yield start, text
+
+
+def _require_server(result, server_url):
+    if result is None:
+        raise RuntimeError(f"Transcription server at {server_url} stopped")
+    return result
+
+
+def save_note(vault, result, stream=False, recorded=None, echo=False):
+    """Write a transcription result to a new note and return (note path, whether it is new).
+
+    result is what transcribe_file (or start_stream, with stream) returns.
+    If the vault already has a note for the same audio and settings, no
+    new note is written and that note is returned instead. Another thread
+    saving the same audio is waited for, so copies in a batch get one note.
+    """
+    key = result[0] if stream else result["key"]
+    with key_lock(key and (os.path.abspath(vault), key)):
+        existing = find_note(vault, key)
+        if existing:
+            if stream and hasattr(result[2], "close"):
+                # Don't transcribe what won't be written
+                result[2].close()
+            return existing, False
+        if stream:
+            segments = _echo(result[2]) if echo else result[2]
+            note = write_streamed_note(vault, segments, recorded)
+        else:
+            note = write_note(vault, result["text"], recorded)
+        remember_note(vault, key, note)
+    return note, True
+
+
+def transcribe_recording(transcribe, audio_file, vault, manifest_path, settings, stream=False):
+    """Transcribe one recording of a batch into a note and record it in the manifest."""
+    try:
+        note, new = save_note(vault, transcribe(audio_file), stream, recorded=os.path.getmtime(audio_file))
+        record_transcript(manifest_path, audio_file, note, settings)
+    except Exception as e:
+        print(f"Transcription failed for {audio_file}: {e}")
+        return False
+    if new:
+        print(f"Transcribed {os.path.basename(audio_file)} to {note}")
+    else:
+        print(f"{os.path.basename(audio_file)} is already transcribed in {note}")
+    return True
+
+
+def transcribe_folder(folder, vault, server_url, workers=None, local=False, watch=False, settle_time=5.0,
+                      stream=False, model_options=None, cache=True, cache_dir=TRANSCRIPT_CACHE_DIR):
+    """Transcribe every recording in folder not already in its manifest.
+
+    Recordings are worked through by a pool of `workers` threads: the
+    server's worker count when it is running, otherwise models loaded
+    here (default: one per 4 cores). With watch, new recordings are
+    queued as they finish copying until interrupted. With stream, each
+    note is written chunk by chunk while its recording is transcribed.
+    model_options (name, backend, ...), cache and cache_dir are for models
+    loaded here; the server uses its own.
+    """
+    info = None if local else server_info(server_url)
+    if info:
+        workers = workers or info.get("workers", 1)
+        settings = info.get("settings") or {"model": info.get("model")}
+        send = stream_with_server if stream else transcribe_with_server
+        transcribe = lambda audio_file: _require_server(send(server_url, audio_file), server_url)
+    else:
+        if not local:
+            print(f"No transcription server at {server_url}; loading the model here.")
+        workers = workers or default_workers()
+        settings = local_settings(model_options)
+        transcribe = local_transcriber(workers, stream, model_options, cache, cache_dir)
+
+    manifest_path = os.path.join(folder, MANIFEST_NAME)
+    manifest = load_json(manifest_path)
+    recordings = [path for path in list_recordings(folder) if not is_transcribed(manifest, path, settings)]
+    print(f"{len(recordings)} recording(s) to transcribe with {workers} worker(s)")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(transcribe_recording, transcribe, path, vault, manifest_path, settings, stream)
+                   for path in recordings]
+        if watch:
+            try:
+                for path in iter_new_files([folder], AUDIO_EXTENSIONS, settle_time):
+                    print(f"New recording: {os.path.basename(path)}")
+                    futures.append(executor.submit(transcribe_recording, transcribe, path, vault,
+                                                   manifest_path, settings, stream))
+            except KeyboardInterrupt:
+                print("Stopped watching; finishing queued recordings...")
+    failed = sum(1 for future in futures if not future.result())
+    if failed:
+        print(f"{failed} recording(s) failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a voice recording into an Obsidian note.")
+    parser.add_argument("audio_file", nargs="?", default=DEFAULT_AUDIO_FILE, help="Recording to transcribe")
+    parser.add_argument("--vault", default=DEFAULT_VAULT_PATH, help="Folder the note is saved in")
+    parser.add_argument("--server", default=SERVER_URL, help="URL of whisper_server.py")
+    parser.add_argument("--local", action="store_true",
+                        help="Load the model in this process instead of using the server")
+    parser.add_argument("--model", default=WHISPER_MODEL, help="Whisper model used when loading it here")
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="Inference engine used when loading the model here")
+    parser.add_argument("--compute-type", choices=COMPUTE_TYPES, default=DEFAULT_COMPUTE_TYPE,
+                        help="Weight precision for faster-whisper")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="When loading the model here, always transcribe instead of reusing cached transcripts")
+    parser.add_argument("--cache-dir", default=TRANSCRIPT_CACHE_DIR,
+                        help="Where transcripts are cached when loading the model here")
+    parser.add_argument("--folder", default=None,
+                        help="Transcribe every new recording in this folder instead of a single file")
+    parser.add_argument("--watch", action="store_true",
+                        help="With --folder, keep watching it and transcribe recordings as they arrive")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Recordings transcribed at once with --folder (default: the server's, or one per 4 cores)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Transcribe in chunks split at pauses and write the note as it goes (for long recordings)")
+    parser.add_argument("--settle-time", type=float, default=5.0,
+                        help="Seconds a new recording's size must stay unchanged before it is transcribed")
+    args = parser.parse_args()
+    model_options = {"name": args.model, "download_root": MODEL_DIR, "backend": args.backend,
+                     "compute_type": args.compute_type}
+
+    if args.folder:
+        if not os.path.isdir(args.folder):
+            print(f"Folder not found: {args.folder}")
             sys.exit(1)
-except Exception as e:
-    print(f"Failed to read WAV file: {e}")
-    sys.exit(1)
-
-# Transcribe the audio
-try:
-    result = model.transcribe(audio_file)
-    transcript = result["text"]
-except Exception as e:
-    print(f"Transcription failed: {e}")
-    sys.exit(1)
-
-# Define the path to save the transcribed note in Obsidian (OUTPUT)
-vault_path = r"C:\Users\felix\Documents\Obisdian\Knowledge\SOPs"  # Replace this with your Obsidian vault path
-if not os.path.exists(vault_path):
-    print(f"Vault path does not exist: {vault_path}")
-    sys.exit(1)
-
-# Create a timestamped filename and save the transcript
-timestamp = time.strftime("%Y%m%d-%H%M%S")
-filename = os.path.join(vault_path, f"QuickVoiceNote-{timestamp}.md")
-with open(filename, 'w', encoding='utf-8') as f:
-    f.write(transcript)
-print(f"Transcribed to {filename}")
\ No newline at end of file
+        if not os.path.exists(args.vault):
+            print(f"Vault path does not exist: {args.vault}")
+            sys.exit(1)
+        transcribe_folder(args.folder, args.vault, args.server, args.workers, args.local, args.watch,
+                          args.settle_time, args.stream, model_options, not args.no_cache, args.cache_dir)
+        return
+
+    # Check if the audio file exists
+    if not os.path.exists(args.audio_file):
+        print(f"Audio file not found: {args.audio_file}")
+        sys.exit(1)
+    if not os.path.exists(args.vault):
+        print(f"Vault path does not exist: {args.vault}")
+        sys.exit(1)
+
+    try:
+        send = stream_with_server if args.stream else transcribe_with_server
+        result = None if args.local else send(args.server, args.audio_file)
+        if result is None:
+            if not args.local:
+                print(f"No transcription server at {args.server}; transcribing here "
+                      "(run whisper_server.py to keep the model loaded between notes).")
+            result = transcribe_locally(args.audio_file, args.stream, model_options, not args.no_cache,
+                                        args.cache_dir)
+        filename, new = save_note(args.vault, result, args.stream, echo=True)
+    except Exception as e:
+        print(f"Transcription failed: {e}")
+        sys.exit(1)
+
+    if new:
+        print(f"Transcribed to {filename}")
+    else:
+        print(f"Already transcribed in {filename}")
+
+
+if __name__ == "__main__":
+    main()